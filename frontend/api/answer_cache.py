@@ -0,0 +1,99 @@
+"""
+Semantic answer cache for the AI QA Bot backend
+Stores previously answered questions as normalized embeddings; a new
+question whose cosine similarity to a stored one clears the threshold is
+answered from the cache. Entries expire after a TTL, the least recently
+used entry is evicted when full, and everything is dropped when the
+knowledge index version changes.
+"""
+
+import threading
+import time
+import numpy as np
+
+from vector_store import normalize_rows
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold=0.95, max_entries=1000, ttl_seconds=3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.index_version = None
+        self._matrix = None  # (max_entries, dimension) normalized question embeddings
+        self._answers = [None] * max_entries
+        self._expires_at = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, index_version):
+        if index_version != self.index_version:
+            self._clear()
+            self.index_version = index_version
+
+    def _clear(self):
+        self._occupied[:] = False
+        self._answers = [None] * self.max_entries
+
+    def lookup(self, embedding, index_version=None):
+        """Return a copy of the cached result for a near-duplicate question, or None"""
+        with self._lock:
+            self._check_version(index_version)
+            if self._matrix is None or not self._occupied.any():
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            self._occupied &= self._expires_at > now
+            scores = self._matrix @ normalize_rows(embedding)
+            scores[~self._occupied] = -1.0
+            slot = int(np.argmax(scores))
+            if scores[slot] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._last_used[slot] = now
+            self.hits += 1
+            result = dict(self._answers[slot])
+            result["cache_similarity"] = round(float(scores[slot]), 4)
+            return result
+
+    def store(self, embedding, result, index_version=None):
+        """Cache ``result``; dropped if the index changed since its question was looked up"""
+        vector = normalize_rows(embedding)
+        with self._lock:
+            if index_version != self.index_version:
+                return
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            now = time.monotonic()
+            self._occupied &= self._expires_at > now
+            free = np.flatnonzero(~self._occupied)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            self._matrix[slot] = vector
+            self._answers[slot] = dict(result)
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._occupied[slot] = True
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": int(self._occupied.sum()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,106 @@
+"""
+Asyncio (ASGI) serving mode for the AI QA Bot backend
+Same /api/chat, /api/health, /api/info and /api/metrics contract as server.py, but every
+conversation is a coroutine that awaits Gemini, embedding and vector calls,
+so one process can hold hundreds of in-flight chats without a thread each.
+
+    python asgi_server.py
+    hypercorn asgi_server:app --bind 0.0.0.0:5000
+"""
+
+import asyncio
+import os
+from quart import Quart, Response, request, jsonify
+
+import server
+
+app = Quart(__name__)
+
+# Global cap on conversations in flight; the rest wait up to ASGI_QUEUE_TIMEOUT seconds
+MAX_CONCURRENT_CHATS = int(os.getenv('ASGI_MAX_CONCURRENCY', '256'))
+QUEUE_TIMEOUT = float(os.getenv('ASGI_QUEUE_TIMEOUT', '30'))
+chat_slots = None
+chats_in_flight = 0  # only touched on the event loop, so no lock is needed
+
+
+@app.before_serving
+async def create_chat_slots():
+    global chat_slots
+    chat_slots = asyncio.Semaphore(MAX_CONCURRENT_CHATS)
+
+
+@app.after_request
+async def add_cors_headers(response):
+    # Same permissive CORS as flask_cors' default in server.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+@app.route('/api/chat', methods=['POST'])
+async def chat():
+    global chats_in_flight
+    try:
+        data = await request.get_json()
+        message = data.get('message', '')
+        bot_type = data.get('botType', 'business')
+
+        if not message:
+            return jsonify({"error": "Message is required"}), 400
+
+        # Building a bot blocks, so a cold bot is constructed off the event loop
+        bot = server.get_bot(bot_type, build=False) or await asyncio.to_thread(server.get_bot, bot_type)
+        if not bot:
+            return jsonify({"error": "Invalid bot type. Use 'business' or 'healthcare'"}), 400
+
+        try:
+            await asyncio.wait_for(chat_slots.acquire(), timeout=QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Concurrency limit of {MAX_CONCURRENT_CHATS} reached, rejecting request")
+            return jsonify({"error": "Server is busy, please retry shortly"}), 503
+
+        chats_in_flight += 1
+        try:
+            print(f"🔄 Processing {bot_type} query: {message[:50]}...")
+            result = server.apply_fallback(await bot.aask(message), message, bot_type)
+        finally:
+            chats_in_flight -= 1
+            chat_slots.release()
+
+        print(f"✅ Response generated with confidence: {result.get('confidence', 0):.2f}")
+        return jsonify(result)
+
+    except Exception as e:
+        print(f"❌ Error processing request: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/health', methods=['GET'])
+async def health():
+    status = server.health_status()
+    status["concurrency"] = {
+        "limit": MAX_CONCURRENT_CHATS,
+        "in_flight": chats_in_flight,
+        "available": MAX_CONCURRENT_CHATS - chats_in_flight
+    }
+    return jsonify(status)
+
+
+@app.route('/api/info', methods=['GET'])
+async def info():
+    """Get information about the bot system"""
+    return jsonify(server.system_info())
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus text exposition, shared with server.py's registry"""
+    return Response(server.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+if __name__ == '__main__':
+    print("🚀 Starting Dual AI QA Bot System (asyncio mode)...")
+    print(f"⚙️  Up to {MAX_CONCURRENT_CHATS} concurrent conversations")
+    print("📡 Server running on http://localhost:5000")
+    app.run(port=5000)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for /api/chat
+Sends a fixed, seeded mix of questions for each botType at the given
+concurrency and reports throughput, latency percentiles and error rates.
+Without --url it starts the server itself with MODEL_BACKEND=fake, so runs
+are offline and reproducible; FAKE_* variables set the stand-in latencies.
+
+Usage:
+    python benchmarks/bench_load.py --concurrency 32 --requests 300
+    python benchmarks/bench_load.py --server asgi --concurrency 128
+    python benchmarks/bench_load.py --url http://localhost:5000 --bots business
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONS = {
+    "business": [
+        "What services does TechFlow Solutions offer?",
+        "How much does the professional plan cost?",
+        "Do you offer cloud migration and how long does it take?",
+        "What are your support hours and response times?",
+        "Can you integrate with our existing CRM and ERP systems?",
+        "What security certifications do you have?",
+        "Is there a free trial and what does it include?",
+        "Hello there!",
+    ],
+    "healthcare": [
+        "What are the symptoms of the flu?",
+        "How is high blood pressure treated and what lifestyle changes help?",
+        "When should I go to the emergency room for chest pain?",
+        "What are the side effects of ibuprofen?",
+        "How much exercise is recommended per week?",
+        "What are signs of depression and when should I seek help?",
+        "Is it safe to take antibiotics with alcohol?",
+        "Hi, who are you?",
+    ],
+}
+
+SERVERS = {
+    "flask": "import server; server.app.run(port={port}, threaded=True)",
+    "asgi": "import asgi_server; asgi_server.app.run(port={port})",
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, bots, timeout=120):
+    """Start the server with the offline stand-ins and wait until the bots are built"""
+    env = dict(os.environ, MODEL_BACKEND="fake", BOT_WARMUP="background")
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVERS[kind].format(port=port)], cwd=API_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{kind} server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/api/health", timeout=2) as response:
+                if set(bots) <= set(json.load(response).get("ready", [])):
+                    return process, url
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def send(url, bot_type, message, timeout):
+    """One /api/chat call; returns (seconds, ok, fallback)"""
+    body = json.dumps({"message": message, "botType": bot_type}).encode("utf-8")
+    request = urllib.request.Request(f"{url}/api/chat", data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.load(response)
+        return time.perf_counter() - start, "error" not in result, result.get("mode") == "fallback"
+    except Exception:
+        return time.perf_counter() - start, False, False
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_load(url, bot_type, requests, concurrency, seed, timeout, unique=False):
+    rng = random.Random(f"{seed}:{bot_type}")
+    messages = [rng.choice(QUESTIONS[bot_type]) for _ in range(requests)]
+    if unique:
+        messages = [f"{message} (case {seed}-{i} {rng.randrange(10 ** 6)})" for i, message in enumerate(messages)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda message: send(url, bot_type, message, timeout), messages))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, ok, _ in results if ok)
+    errors = sum(1 for _, ok, _ in results if not ok)
+    return {
+        "bot": bot_type,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "error_rate": round(errors / requests, 4),
+        "fallback_rate": round(sum(1 for _, _, fallback in results if fallback) / requests, 4),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one with the stand-ins")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="flask", help="Server to start when --url is not given")
+    parser.add_argument("--bots", default="business,healthcare")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per bot type")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per bot type first")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unique", action="store_true",
+                        help="Make every message distinct so the answer cache misses and each request runs the full pipeline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+    bots = [bot for bot in args.bots.split(",") if bot]
+
+    process = None
+    url = args.url
+    if not url:
+        process, url = start_server(args.server, free_port(), bots)
+    try:
+        reports = []
+        for bot_type in bots:
+            if args.warmup:
+                run_load(url, bot_type, args.warmup, min(args.concurrency, args.warmup), args.seed + 1, args.timeout)
+            reports.append(run_load(url, bot_type, args.requests, args.concurrency, args.seed, args.timeout, args.unique))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        for report in reports:
+            print(json.dumps(report))
+        return
+    print(f"{'bot':<11} {'reqs':>5} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'fallback':>9}")
+    for report in reports:
+        print(f"{report['bot']:<11} {report['requests']:>5} {report['concurrency']:>5} {report['throughput_rps']:>8.2f} "
+              f"{report['p50_ms']:>8.1f} {report['p95_ms']:>8.1f} {report['p99_ms']:>8.1f} "
+              f"{report['error_rate']:>7.2%} {report['fallback_rate']:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
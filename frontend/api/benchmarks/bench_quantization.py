@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Memory / recall / latency benchmark for quantized vector storage
+Compares exact float32 search against int8 and PQ codes, with and without
+exact re-scoring, on synthetic clustered embeddings. Re-scoring reads the
+full vectors from a memory-mapped vector file; "mmap MB" is what it can page
+in, and the ratio counts it against the codes.
+
+Usage: python benchmarks/bench_quantization.py --vectors 50000 --dimension 768
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import LocalVectorStore
+from vector_file import MappedVectorStore, write_vector_file
+from quantization import QuantizedVectorStore
+
+
+def make_corpus(n_vectors, n_queries, dimension, n_clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, n_clusters, n_vectors)]
+    vectors = vectors + 0.6 * rng.normal(size=vectors.shape).astype(np.float32)
+    queries = centers[rng.integers(0, n_clusters, n_queries)]
+    queries = queries + 0.6 * rng.normal(size=queries.shape).astype(np.float32)
+    return vectors, queries
+
+
+def run_queries(store, queries, top_k):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([match['id'] for match in store.query(query, top_k=top_k, include_metadata=False)['matches']])
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return results, elapsed_ms
+
+
+def recall(truth, results):
+    hits = sum(len(set(t) & set(r)) for t, r in zip(truth, results))
+    return hits / sum(len(t) for t in truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--pq-subvectors", type=int, default=None)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.vectors, args.queries, args.dimension, args.clusters, args.seed)
+    ids = [str(i) for i in range(args.vectors)]
+
+    exact = LocalVectorStore()
+    exact.add(ids, vectors)
+    truth, exact_ms = run_queries(exact, queries, args.top_k)
+    float_bytes = exact.vectors.nbytes
+
+    vector_dir = tempfile.TemporaryDirectory()
+    vector_path = os.path.join(vector_dir.name, "bench.vec")
+    write_vector_file(vector_path, exact)
+    mapped = MappedVectorStore(vector_path)
+
+    print(f"📊 {args.vectors} vectors x {args.dimension} dims, {args.queries} queries, recall@{args.top_k}")
+    print(f"{'store':<22}{'RAM MB':>10}{'mmap MB':>10}{'ratio':>8}{'recall':>9}{'ms/query':>11}")
+    print(f"{'float32 exact':<22}{float_bytes / 1e6:>10.1f}{0.0:>10.1f}{1.0:>7.1f}x{1.0:>9.3f}{exact_ms:>11.2f}")
+
+    for method in ("int8", "pq"):
+        start = time.perf_counter()
+        store = QuantizedVectorStore.from_store(
+            mapped, method=method, n_subvectors=args.pq_subvectors,
+            rescore=True, rescore_factor=args.rescore_factor
+        )
+        build_s = time.perf_counter() - start
+
+        for rescore in (False, True):
+            store.rescore_factor = args.rescore_factor if rescore else 1
+            results, elapsed_ms = run_queries(store, queries, args.top_k)
+            mapped_bytes = store.rescore_nbytes
+            ratio = float_bytes / (store.nbytes + mapped_bytes)
+            label = f"{method}{' + rescore' if rescore else ''}"
+            print(f"{label:<22}{store.nbytes / 1e6:>10.1f}{mapped_bytes / 1e6:>10.1f}{ratio:>7.1f}x"
+                  f"{recall(truth, results):>9.3f}{elapsed_ms:>11.2f}")
+        print(f"   ({method} build: {build_s:.1f}s)")
+
+    mapped.close()
+    vector_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
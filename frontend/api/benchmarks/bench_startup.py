@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the backend server
+Imports server.py in a fresh interpreter per run and reports import time,
+resident memory and which heavy libraries were loaded, for eager bot
+construction (the old import-time behaviour) against lazy construction.
+
+Usage: python benchmarks/bench_startup.py --runs 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    "sentence_transformers", "torch", "datasets", "langchain", "langchain_google_genai",
+    "pinecone", "google.generativeai",
+]
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = """
+import json, os, resource, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+start = time.perf_counter()
+import server
+import_seconds = time.perf_counter() - start
+import_rss = rss_mb()
+
+first_request = {}
+for bot_type in server.BOT_CLASSES:
+    start = time.perf_counter()
+    server.get_bot(bot_type)
+    first_request[bot_type] = time.perf_counter() - start
+
+print(json.dumps({
+    'import_seconds': import_seconds,
+    'import_rss_mb': import_rss,
+    'ready_rss_mb': rss_mb(),
+    'first_request_seconds': first_request,
+    'heavy_modules': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_child(mode):
+    env = dict(os.environ, BOT_WARMUP=mode)
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=API_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'import s':>9} {'RSS MB':>8} {'first business s':>17} {'first healthcare s':>19} {'ready RSS MB':>13}")
+    for mode in ("eager", "lazy"):
+        results = [run_child(mode) for _ in range(args.runs)]
+        median = lambda key: statistics.median(result[key] for result in results)
+        first = lambda bot_type: statistics.median(result['first_request_seconds'][bot_type] for result in results)
+        print(f"{mode:<8} {median('import_seconds'):>9.3f} {median('import_rss_mb'):>8.1f} "
+              f"{first('business'):>17.3f} {first('healthcare'):>19.3f} {median('ready_rss_mb'):>13.1f}")
+        print(f"         heavy modules after first requests: {', '.join(results[-1]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
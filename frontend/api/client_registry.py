@@ -0,0 +1,246 @@
+"""
+Process-wide registry of model and vector-store clients for the AI QA Bot backend
+Chat models are shared per (model, temperature, max_tokens), embedding models
+per model name and Pinecone clients per API key, so model memory and
+connection setup are paid once instead of once per agent. Every
+ChatGoogleGenerativeAI construction re-runs genai.configure(), which drops
+the cached gRPC clients, so building them once also keeps connections alive.
+With ``fake_backends`` set (MODEL_BACKEND=fake) every client is replaced by
+the local stand-ins from fake_backends.py.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+
+class PooledChatModel:
+    """Shared chat model that caps in-flight calls at ``pool_size``.
+
+    Sync and async callers have separate slots. Anything not wrapped here is
+    delegated to the underlying model. Every completed call is reported to
+    ``listeners`` as ``listener(prompt, completion_text)``.
+    """
+
+    def __init__(self, model, pool_size, listeners=None):
+        self.model = model
+        self.pool_size = pool_size
+        self.listeners = listeners if listeners is not None else []
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._async_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+
+    def _started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+
+    def _finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def _slot(self):
+        with self._slots:
+            self._started()
+            try:
+                yield
+            finally:
+                self._finished()
+
+    @asynccontextmanager
+    async def _async_slot(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.pool_size)
+        async with slots:
+            self._started()
+            try:
+                yield
+            finally:
+                self._finished()
+
+    def _notify(self, prompt, completion):
+        for listener in self.listeners:
+            try:
+                listener(prompt, completion)
+            except Exception as e:
+                print(f"LLM listener error: {e}")
+
+    def invoke(self, prompt, **kwargs):
+        with self._slot():
+            response = self.model.invoke(prompt, **kwargs)
+        self._notify(prompt, str(getattr(response, 'content', '')))
+        return response
+
+    def stream(self, prompt, **kwargs):
+        parts = []
+        with self._slot():
+            for chunk in self.model.stream(prompt, **kwargs):
+                parts.append(str(getattr(chunk, 'content', '')))
+                yield chunk
+        self._notify(prompt, "".join(parts))
+
+    async def ainvoke(self, prompt, **kwargs):
+        async with self._async_slot():
+            response = await self.model.ainvoke(prompt, **kwargs)
+        self._notify(prompt, str(getattr(response, 'content', '')))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def stats(self):
+        with self._lock:
+            return {"pool_size": self.pool_size, "in_flight": self.in_flight, "calls": self.calls}
+
+
+class ClientRegistry:
+    """Builds each client once and hands the same instance to every caller"""
+
+    def __init__(self, llm_pool_size=32, pinecone_pool_threads=8, gemini_transport=None, fake_backends=None):
+        self.llm_pool_size = llm_pool_size
+        self.pinecone_pool_threads = pinecone_pool_threads
+        self.gemini_transport = gemini_transport  # None (library default, gRPC), "grpc" or "rest"
+        self.fake_backends = fake_backends  # FakeBackendSettings to use local stand-ins
+        self._chat_models = {}
+        self._embedding_models = {}
+        self._pinecone_clients = {}
+        self._pinecone_indexes = {}
+        self._configured_keys = set()
+        self._llm_listeners = []  # shared by every PooledChatModel, so listeners added later still apply
+        self._lock = threading.RLock()
+
+    def configure_gemini(self, api_key):
+        """Run genai.configure once per key instead of once per config object"""
+        with self._lock:
+            if api_key in self._configured_keys or self.fake_backends:
+                return
+            import google.generativeai as genai
+            genai.configure(api_key=api_key, transport=self.gemini_transport)
+            self._configured_keys.add(api_key)
+
+    def add_llm_listener(self, listener):
+        """Call ``listener(prompt, completion_text)`` after every chat model call"""
+        with self._lock:
+            if listener not in self._llm_listeners:
+                self._llm_listeners.append(listener)
+
+    def chat_model(self, model, api_key, temperature, max_tokens):
+        key = (model, temperature, max_tokens, api_key)
+        with self._lock:
+            if key not in self._chat_models and self.fake_backends:
+                from fake_backends import FakeChatModel
+                self._chat_models[key] = PooledChatModel(FakeChatModel(
+                    model=model,
+                    max_tokens=max_tokens,
+                    latency_ms=self.fake_backends.llm_latency_ms,
+                    tokens_per_second=self.fake_backends.llm_tokens_per_second,
+                    output_tokens=self.fake_backends.llm_output_tokens
+                ), self.llm_pool_size, self._llm_listeners)
+            elif key not in self._chat_models:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                self._chat_models[key] = PooledChatModel(ChatGoogleGenerativeAI(
+                    model=model,
+                    google_api_key=api_key,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    transport=self.gemini_transport
+                ), self.llm_pool_size, self._llm_listeners)
+                self._configured_keys.add(api_key)
+            return self._chat_models[key]
+
+    def _fake_embeddings(self):
+        from fake_backends import FakeEmbeddings
+        return FakeEmbeddings(
+            dimension=self.fake_backends.embedding_dimension,
+            latency_ms=self.fake_backends.embedding_latency_ms,
+            item_ms=self.fake_backends.embedding_item_ms
+        )
+
+    def sentence_transformer(self, model_name):
+        key = ("sentence-transformers", model_name)
+        with self._lock:
+            if key not in self._embedding_models and self.fake_backends:
+                self._embedding_models[key] = self._fake_embeddings()
+            elif key not in self._embedding_models:
+                from sentence_transformers import SentenceTransformer
+                self._embedding_models[key] = SentenceTransformer(model_name)
+            return self._embedding_models[key]
+
+    def gemini_embeddings(self, model, api_key):
+        key = ("gemini", model, api_key)
+        with self._lock:
+            if key not in self._embedding_models and self.fake_backends:
+                self._embedding_models[key] = self._fake_embeddings()
+            elif key not in self._embedding_models:
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                self._embedding_models[key] = GoogleGenerativeAIEmbeddings(
+                    model=model,
+                    google_api_key=api_key,
+                    transport=self.gemini_transport
+                )
+                self._configured_keys.add(api_key)
+            return self._embedding_models[key]
+
+    def pinecone_client(self, api_key):
+        with self._lock:
+            if api_key not in self._pinecone_clients and self.fake_backends:
+                from fake_backends import FakePinecone
+                self._pinecone_clients[api_key] = FakePinecone(latency_ms=self.fake_backends.index_latency_ms)
+            elif api_key not in self._pinecone_clients:
+                from pinecone import Pinecone
+                self._pinecone_clients[api_key] = Pinecone(api_key=api_key, pool_threads=self.pinecone_pool_threads)
+            return self._pinecone_clients[api_key]
+
+    def pinecone_index(self, api_key, index_name):
+        key = (api_key, index_name)
+        with self._lock:
+            if key not in self._pinecone_indexes:
+                self._pinecone_indexes[key] = self.pinecone_client(api_key).Index(index_name)
+            return self._pinecone_indexes[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "chat_models": {
+                    f"{model}/t={temperature}/max={max_tokens}": client.stats()
+                    for (model, temperature, max_tokens, _), client in self._chat_models.items()
+                },
+                "embedding_models": [key[1] for key in self._embedding_models],
+                "pinecone_indexes": [index_name for _, index_name in self._pinecone_indexes],
+                "pinecone_pool_threads": self.pinecone_pool_threads,
+                "gemini_transport": self.gemini_transport or "grpc",
+                "backend": "fake" if self.fake_backends else "live"
+            }
+
+
+_shared_registry = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    """Process-wide registry, sized from LLM_POOL_SIZE / PINECONE_POOL_THREADS / GEMINI_TRANSPORT.
+
+    MODEL_BACKEND=fake swaps every client for the offline stand-ins.
+    """
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            fake_backends = None
+            if os.getenv('MODEL_BACKEND', 'gemini') == 'fake':
+                from fake_backends import FakeBackendSettings
+                fake_backends = FakeBackendSettings()
+            _shared_registry = ClientRegistry(
+                llm_pool_size=int(os.getenv('LLM_POOL_SIZE', '32')),
+                pinecone_pool_threads=int(os.getenv('PINECONE_POOL_THREADS', '8')),
+                gemini_transport=os.getenv('GEMINI_TRANSPORT') or None,
+                fake_backends=fake_backends
+            )
+        return _shared_registry
@@ -0,0 +1,131 @@
+"""
+Token-budgeted context packing for the answer prompts
+Retrieved chunks overlap (the splitters carry ``chunk_overlap`` characters
+from one chunk into the next) and vary in size, so joining them as-is makes
+prompt size, LLM latency and cost follow the chunking. ContextPacker trims
+the overlap, then fills a fixed token budget with the best-scoring documents,
+cutting the last one back to whole sentences when it does not fit.
+"""
+
+import re
+
+from metrics import estimate_tokens, stage, CONTEXT_TOKENS, CONTEXT_TOKENS_SAVED
+
+# After ., ! or ? (but not a list number like "3."), or at a blank line
+SENTENCE_END = re.compile(r'(?<=[.!?])(?<!\d\.)\s+|\n\s*\n')
+
+
+def plain_text(doc):
+    return doc.get('text', '')
+
+
+class ContextPacker:
+    """Fit up to ``max_documents`` retrieved documents into ``token_budget`` tokens, best scores first.
+
+    ``format_document(doc)`` renders one document (headers included) and
+    ``separator`` joins them; both count against the budget. Tokens are
+    estimated with ``count_tokens``.
+    """
+
+    def __init__(self, token_budget, format_document=plain_text, separator="\n\n", max_documents=5,
+                 truncate=True, min_overlap_chars=50, min_sentence_tokens=16, count_tokens=estimate_tokens,
+                 bot="unknown"):
+        self.token_budget = token_budget
+        self.format_document = format_document
+        self.separator = separator
+        self.max_documents = max_documents
+        self.truncate = truncate
+        self.min_overlap_chars = min_overlap_chars  # shorter matches are coincidences, not chunk overlap
+        self.min_sentence_tokens = min_sentence_tokens  # don't bother truncating into less room than this
+        self.count_tokens = count_tokens
+        self.bot = bot
+        self._separator_tokens = count_tokens(separator)
+
+    def pack(self, documents):
+        """(context text, packed documents); packed documents carry the text actually used"""
+        with stage(self.bot, "context_packing"):
+            ranked = sorted(documents, key=lambda doc: doc.get('score', 0), reverse=True)[:self.max_documents]
+            unpacked_tokens = self._tokens(ranked)
+            deduped = self._dedupe(ranked)
+            deduped_tokens = self._tokens(deduped)
+            packed = self._fill(deduped)
+            packed_tokens = self._tokens(packed)
+
+            CONTEXT_TOKENS.observe(packed_tokens, self.bot)
+            CONTEXT_TOKENS_SAVED.inc(self.bot, "overlap", amount=max(0, unpacked_tokens - deduped_tokens))
+            CONTEXT_TOKENS_SAVED.inc(self.bot, "budget", amount=max(0, deduped_tokens - packed_tokens))
+            return self.separator.join(self.format_document(doc) for doc in packed), packed
+
+    def _cost(self, doc):
+        return self.count_tokens(self.format_document(doc))
+
+    def _tokens(self, documents):
+        if not documents:
+            return 0
+        return sum(self._cost(doc) for doc in documents) + self._separator_tokens * (len(documents) - 1)
+
+    def _dedupe(self, ranked):
+        """Drop repeated documents and trim text a better-scored document already covers"""
+        kept = []
+        for doc in ranked:
+            text = doc.get('text', '').strip()
+            for other in kept:
+                text = self._remove_overlap(other['text'], text)
+                if not text:
+                    break
+            if text:
+                kept.append(dict(doc, text=text))
+        return kept
+
+    def _remove_overlap(self, kept_text, text):
+        if text in kept_text:
+            return ''
+        overlap = self._overlap(kept_text, text)  # kept chunk runs into this one
+        if overlap:
+            text = text[overlap:].lstrip()
+        overlap = self._overlap(text, kept_text)  # this chunk runs into the kept one
+        if overlap:
+            text = text[:-overlap].rstrip()
+        return text
+
+    def _overlap(self, first, second):
+        """Length of the longest suffix of ``first`` that is a prefix of ``second`` (0 if too short)"""
+        if len(first) < self.min_overlap_chars or len(second) < self.min_overlap_chars:
+            return 0
+        probe = second[:self.min_overlap_chars]
+        position = first.find(probe, max(0, len(first) - len(second)))
+        while position != -1:
+            if second.startswith(first[position:]):
+                return len(first) - position
+            position = first.find(probe, position + 1)
+        return 0
+
+    def _fill(self, documents):
+        """Greedily take documents in score order while they fit; truncate one that does not"""
+        packed = []
+        used = 0
+        for doc in documents:
+            separator_tokens = self._separator_tokens if packed else 0
+            room = self.token_budget - used - separator_tokens
+            cost = self._cost(doc)
+            if cost > room:
+                if not self.truncate or room < self.min_sentence_tokens:
+                    continue
+                doc = self._truncate(doc, room)
+                if doc is None:
+                    continue
+                cost = self._cost(doc)
+            packed.append(doc)
+            used += cost + separator_tokens
+        return packed
+
+    def _truncate(self, doc, room):
+        """``doc`` cut back to the most leading sentences that fit in ``room`` tokens, or None"""
+        text = doc['text']
+        best = None
+        for match in SENTENCE_END.finditer(text):
+            candidate = dict(doc, text=text[:match.start()])
+            if self._cost(candidate) > room:
+                break
+            best = candidate
+        return best
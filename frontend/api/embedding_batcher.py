@@ -0,0 +1,172 @@
+"""
+Micro-batching scheduler for query embeddings in the AI QA Bot backend
+Concurrent requests each embed one or two short queries. Instead of one
+encode / API call per request, callers enqueue their texts and a worker
+collects everything that arrives within ``max_wait_ms`` (or until
+``max_batch_size`` texts are waiting), embeds it in one call and hands each
+caller its own vectors. One scheduler is shared per embedding model.
+"""
+
+import asyncio
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed_fn, max_batch_size=64, max_wait_ms=5.0, workers=1, timeout=30.0):
+        self.embed_fn = embed_fn  # list of texts -> list of embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self.timeout = timeout  # seconds a caller waits for its embeddings (None waits forever)
+        self._queue = queue.Queue()  # (text, future, enqueued_at)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.embedded = 0  # distinct texts actually sent to the model
+        self.largest_batch = 0
+        self.wait_seconds = 0.0
+        self.embed_seconds = 0.0
+        self.size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"embedding-batcher-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, texts):
+        """Queue texts for embedding; returns one Future per text"""
+        self._start_workers()
+        futures = []
+        now = time.monotonic()
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future, now))
+            futures.append(future)
+        with self._lock:
+            self.requests += 1
+        return futures
+
+    def embed(self, texts):
+        """Blocking embed; waits up to ``timeout`` seconds for the batch(es) holding these texts"""
+        futures = self.submit(texts)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        try:
+            return [future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                    for future in futures]
+        except TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise TimeoutError(f"Embedding {len(texts)} queries took longer than {self.timeout}s")
+
+    async def aembed(self, texts):
+        futures = self.submit(texts)
+        try:
+            return list(await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), self.timeout))
+        except asyncio.TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise TimeoutError(f"Embedding {len(texts)} queries took longer than {self.timeout}s")
+
+    def _collect(self):
+        """Block for one item, then gather more until the batch is full or max_wait has passed"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._embed_batch(batch)
+            except Exception as e:
+                # Whatever went wrong, no caller in this batch may be left waiting
+                for _, future, _ in batch:
+                    if not future.done():
+                        try:
+                            future.set_exception(e)
+                        except InvalidStateError:  # cancelled meanwhile
+                            pass
+
+    def _embed_batch(self, batch):
+        started = time.monotonic()
+        # Callers that gave up (cancelled futures) are dropped before embedding
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            embeddings = list(self.embed_fn(texts))
+            if len(embeddings) != len(texts):
+                raise ValueError(f"embed_fn returned {len(embeddings)} embeddings for {len(texts)} texts")
+            by_text = dict(zip(texts, embeddings))
+            for text, future, _ in batch:
+                future.set_result(by_text[text])
+        finally:
+            self._record(batch, len(texts), started)
+
+    def _record(self, batch, distinct, started):
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.embedded += distinct
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.wait_seconds += sum(started - enqueued_at for _, _, enqueued_at in batch)
+            self.embed_seconds += time.monotonic() - started
+            self.size_histogram[bisect.bisect_left(BATCH_SIZE_BUCKETS, len(batch))] += 1
+
+    def stats(self):
+        with self._lock:
+            labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "workers": self.workers,
+                "timeout_s": self.timeout,
+                "requests": self.requests,
+                "items": self.items,
+                "batches": self.batches,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "duplicates_merged": self.items - self.embedded,
+                "mean_queue_wait_ms": round(self.wait_seconds / self.items * 1000, 3) if self.items else 0.0,
+                "mean_embed_ms": round(self.embed_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+                "batch_sizes": {label: count for label, count in zip(labels, self.size_histogram) if count},
+                "queued": self._queue.qsize()
+            }
+
+
+_shared_batchers = {}
+_shared_batchers_lock = threading.Lock()
+
+
+def get_embedding_batcher(model_name, embed_fn, max_batch_size=64, max_wait_ms=5.0, workers=1, timeout=30.0):
+    """Process-wide scheduler per embedding model; settings only apply on the first call"""
+    with _shared_batchers_lock:
+        if model_name not in _shared_batchers:
+            _shared_batchers[model_name] = EmbeddingBatcher(embed_fn, max_batch_size, max_wait_ms, workers, timeout)
+        return _shared_batchers[model_name]
+
+
+def embedding_batcher_stats():
+    with _shared_batchers_lock:
+        return {model_name: batcher.stats() for model_name, batcher in _shared_batchers.items()}
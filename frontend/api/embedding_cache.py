@@ -0,0 +1,100 @@
+"""
+Query embedding cache for the AI QA Bot backend
+A thread-safe LRU cache with TTL and a byte budget, keyed on the embedding
+model name plus normalized query text. One process-wide instance is shared,
+so the business and healthcare managers reuse each other's entries when
+they embed with the same model.
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+
+def normalize_text(text):
+    """Cache key normalization: NFKC, lowercase, collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (float32 vector, expires_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name, text):
+        return (model_name, normalize_text(text))
+
+    def get(self, model_name, text):
+        """Return the cached embedding as a list of floats, or None"""
+        key = self.make_key(model_name, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            vector = entry[0]
+        return vector.tolist()
+
+    def put(self, model_name, text, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.nbytes > self.max_bytes:
+            return
+        key = self.make_key(model_name, text)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, time.monotonic() + self.ttl_seconds)
+            self.current_bytes += vector.nbytes
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        vector, _ = self._entries.pop(key)
+        self.current_bytes -= vector.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(max_entries=10000, max_bytes=64 * 1024 * 1024, ttl_seconds=3600):
+    """Process-wide cache; sizing arguments only apply on the first call"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache(max_entries, max_bytes, ttl_seconds)
+        return _shared_cache
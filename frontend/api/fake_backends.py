@@ -0,0 +1,183 @@
+"""
+Deterministic local stand-ins for Gemini and Pinecone
+With MODEL_BACKEND=fake the client registry hands these out instead of the
+real clients, so the whole server (both bots, every code path) can be load
+tested offline without API keys or quota. Outputs depend only on the input
+text, and latencies are fixed, so benchmark runs are reproducible.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import zlib
+import numpy as np
+
+from vector_store import LocalVectorStore
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Vocabulary for generated answers; the content only has to look like prose
+FILLER_WORDS = (
+    "the service support team plan customers data security pricing platform integration "
+    "symptoms treatment doctor care health condition recommend consult information available "
+    "options include typically based on your specific needs please contact us for details"
+).split()
+
+
+class FakeBackendSettings:
+    """Latency and size knobs for the stand-ins, read from FAKE_* environment variables"""
+
+    def __init__(self):
+        self.llm_latency_ms = float(os.getenv('FAKE_LLM_LATENCY_MS', '300'))  # time to first token
+        self.llm_tokens_per_second = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '100'))
+        self.llm_output_tokens = int(os.getenv('FAKE_LLM_OUTPUT_TOKENS', '60'))
+        self.embedding_latency_ms = float(os.getenv('FAKE_EMBEDDING_LATENCY_MS', '20'))  # per call
+        self.embedding_item_ms = float(os.getenv('FAKE_EMBEDDING_ITEM_MS', '1'))  # per text in a call
+        self.embedding_dimension = int(os.getenv('FAKE_EMBEDDING_DIMENSION', '384'))
+        self.index_latency_ms = float(os.getenv('FAKE_INDEX_LATENCY_MS', '10'))
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChatModel:
+    """Chat model whose reply is derived from a hash of the prompt.
+
+    Replies are a few short sentences on separate lines (so Self-Ask
+    decomposition still finds sub-questions) with about ``output_tokens``
+    words, capped at ``max_tokens``. A call takes ``latency_ms`` plus one
+    ``1 / tokens_per_second`` interval per word, streamed word by word.
+    """
+
+    def __init__(self, model="fake-chat", max_tokens=150, latency_ms=300, tokens_per_second=100, output_tokens=60):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.latency = latency_ms / 1000.0
+        self.token_interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.output_tokens = min(output_tokens, max_tokens)
+
+    def _words(self, prompt):
+        rng = random.Random(hashlib.sha1(str(prompt).encode('utf-8')).hexdigest())
+        words = []
+        for i in range(self.output_tokens):
+            word = rng.choice(FILLER_WORDS)
+            end_of_sentence = i % 12 == 11 or i == self.output_tokens - 1
+            words.append(word + (".\n" if end_of_sentence else " "))
+        return words
+
+    def invoke(self, prompt, **kwargs):
+        words = self._words(prompt)
+        time.sleep(self.latency + self.token_interval * len(words))
+        return FakeMessage("".join(words).strip())
+
+    def stream(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        for word in self._words(prompt):
+            time.sleep(self.token_interval)
+            yield FakeMessage(word)
+
+    async def ainvoke(self, prompt, **kwargs):
+        words = self._words(prompt)
+        await asyncio.sleep(self.latency + self.token_interval * len(words))
+        return FakeMessage("".join(words).strip())
+
+
+class FakeEmbeddings:
+    """Hashed bag-of-words embeddings: texts sharing words get similar vectors.
+
+    Exposes both the LangChain (``embed_documents``) and SentenceTransformer
+    (``encode``) interfaces.
+    """
+
+    def __init__(self, dimension=384, latency_ms=20, item_ms=1):
+        self.dimension = dimension
+        self.latency = latency_ms / 1000.0
+        self.item_latency = item_ms / 1000.0
+
+    def _vectors(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD_PATTERN.findall(text.lower()):
+                digest = zlib.crc32(word.encode('utf-8'))
+                vectors[row, digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _delay(self, count):
+        return self.latency + self.item_latency * count
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self._delay(len(texts)))
+        return self._vectors(texts)
+
+    def embed_documents(self, texts):
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(self._delay(len(texts)))
+        return self._vectors(texts).tolist()
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakePineconeIndex:
+    """In-memory index with only the Pinecone ``Index`` calls and a fixed per-call latency.
+
+    It wraps a ``LocalVectorStore`` rather than extending it, so callers see
+    exactly the Pinecone surface (no ``query_many``, no ``len``) and take the
+    same code paths they would against the real service.
+    """
+
+    def __init__(self, name, latency_ms=10):
+        self.name = name
+        self.latency = latency_ms / 1000.0
+        self._store = LocalVectorStore()
+        self._write_lock = threading.Lock()
+
+    def upsert(self, vectors=None, namespace=None, **kwargs):
+        time.sleep(self.latency)
+        with self._write_lock:
+            self._store.upsert(vectors or [])
+        return {"upserted_count": len(vectors or [])}
+
+    def query(self, vector=None, top_k=5, include_metadata=True, **kwargs):
+        time.sleep(self.latency)
+        return self._store.query(vector, top_k=top_k, include_metadata=include_metadata)
+
+    def delete(self, ids=None, namespace=None, **kwargs):
+        time.sleep(self.latency)
+        with self._write_lock:
+            self._store.delete(ids or [])
+        return {}
+
+    def describe_index_stats(self, **kwargs):
+        return {"dimension": self._store.dimension, "total_vector_count": len(self._store)}
+
+
+class FakePinecone:
+    """Stand-in for ``pinecone.Pinecone``: named in-memory indexes, created on first use"""
+
+    def __init__(self, latency_ms=10):
+        self.latency_ms = latency_ms
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def Index(self, name):
+        with self._lock:
+            if name not in self._indexes:
+                self._indexes[name] = FakePineconeIndex(name, self.latency_ms)
+            return self._indexes[name]
+
+    def list_indexes(self):
+        return [{"name": name} for name in self._indexes]
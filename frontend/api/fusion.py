@@ -0,0 +1,56 @@
+"""
+Result fusion for hybrid (dense + lexical) retrieval
+Both functions take ranked lists of ``{'id', 'text', 'source', 'score'}``
+dicts, dedupe them by chunk id and return one list ordered by the fused
+score. Fused docs keep their best component ``score`` so confidence
+calculations stay on the same 0-1 scale, and gain a ``fusion_score``.
+"""
+
+from typing import List, Dict, Any, Optional
+
+
+def _dedupe_key(doc, text_keys):
+    """Chunk id, falling back to the text when backends disagree on ids"""
+    text = doc.get('text')
+    key = doc.get('id') or text
+    if text:
+        key = text_keys.setdefault(text, key)
+    return key
+
+
+def _fuse(result_lists, weights, contributions, top_k):
+    fused = {}
+    merged = {}
+    text_keys = {}
+    for weight, results, values in zip(weights, result_lists, contributions):
+        for doc, value in zip(results, values):
+            key = _dedupe_key(doc, text_keys)
+            fused[key] = fused.get(key, 0.0) + weight * value
+            if key not in merged:
+                merged[key] = dict(doc)
+            elif doc.get('score', 0) > merged[key].get('score', 0):
+                merged[key]['score'] = doc['score']
+
+    ranked = sorted(merged, key=fused.get, reverse=True)[:top_k]
+    return [dict(merged[key], fusion_score=fused[key]) for key in ranked]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], k=60,
+                           weights: Optional[List[float]] = None, top_k=None):
+    """Reciprocal rank fusion: sum of weight / (k + rank) across lists"""
+    weights = weights or [1.0] * len(result_lists)
+    contributions = [[1.0 / (k + rank) for rank in range(1, len(results) + 1)] for results in result_lists]
+    return _fuse(result_lists, weights, contributions, top_k)
+
+
+def weighted_score_fusion(result_lists: List[List[Dict[str, Any]]],
+                          weights: Optional[List[float]] = None, top_k=None):
+    """Weighted sum of min-max normalized scores from each list"""
+    weights = weights or [1.0] * len(result_lists)
+    contributions = []
+    for results in result_lists:
+        scores = [doc.get('score', 0.0) for doc in results]
+        low, high = (min(scores), max(scores)) if scores else (0.0, 0.0)
+        spread = high - low
+        contributions.append([(score - low) / spread if spread else 1.0 for score in scores])
+    return _fuse(result_lists, weights, contributions, top_k)
@@ -0,0 +1,129 @@
+"""
+Streaming loader for the medical_dialog healthcare corpus
+Replaces the notebook's HealthcareDatasetLoader, which loaded a
+``train[:10000]`` slice into memory. Records are read lazily from local
+dataset files (Arrow shards from the Hugging Face cache, Parquet or JSONL),
+one record batch at a time, so memory stays flat whatever the corpus size.
+
+    python ingest.py --bot healthcare --dataset medical_dialog ~/.cache/huggingface/datasets/medical_dialog --processes 8
+"""
+
+import json
+import os
+import re
+import unicodedata
+
+DATASET_EXTENSIONS = ('.arrow', '.parquet', '.jsonl')
+MIN_UTTERANCE_CHARS = 20  # shorter doctor turns ("Hi.", "Thanks") carry no medical content
+URL_PATTERN = re.compile(r'https?://\S+')
+SPEAKER_PATTERN = re.compile(r'^\s*(doctor|patient)\s*:\s*', re.IGNORECASE)
+SPEAKER_LABELS = ['patient', 'doctor']  # ClassLabel order in the Arrow shards of the "en" config
+
+
+def clean_medical_text(text):
+    """Normalize unicode, drop URLs and collapse whitespace; '' for text too short to index.
+
+    Module-level so it can be shipped to ingestion worker processes.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = URL_PATTERN.sub('', text)
+    text = " ".join(text.split())
+    body = text.split(':', 1)[1] if text.startswith('Medical Q&A:') else text
+    return text if len(body.strip()) >= MIN_UTTERANCE_CHARS else ''
+
+
+def iter_dataset_files(inputs):
+    """Dataset shards under the given files/directories, in a stable order"""
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    # cache-*.arrow files are derived outputs of datasets' map(), not source shards
+                    if name.endswith(DATASET_EXTENSIONS) and not name.startswith('cache-'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+class HealthcareDatasetLoader:
+    """Yields {content, source, type} documents from medical_dialog shards lazily.
+
+    Only turns by ``speaker`` (the doctor, by default) become documents, as in
+    the notebook loader. Sources are derived from the dialogue id or shard
+    position so re-ingesting the same files produces the same sources.
+    """
+
+    def __init__(self, inputs, speaker='doctor', batch_rows=1024):
+        self.inputs = inputs
+        self.speaker = speaker
+        self.batch_rows = batch_rows
+
+    def iter_records(self):
+        """(shard name, row number, record dict) for every row of every shard"""
+        for path in iter_dataset_files(self.inputs):
+            name = os.path.basename(path)
+            if path.endswith('.arrow'):
+                rows = self._iter_arrow(path)
+            elif path.endswith('.parquet'):
+                rows = self._iter_parquet(path)
+            else:
+                rows = self._iter_jsonl(path)
+            for row_number, record in enumerate(rows):
+                yield name, row_number, record
+
+    def _iter_arrow(self, path):
+        import pyarrow as pa
+        # Hugging Face cache shards are Arrow IPC streams; plain Arrow files use the file format
+        with pa.memory_map(path, 'r') as source:
+            try:
+                reader = pa.ipc.open_stream(source)
+            except pa.ArrowInvalid:
+                source.seek(0)
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield from reader.get_batch(i).to_pylist()
+                return
+            for batch in reader:
+                yield from batch.to_pylist()
+
+    def _iter_parquet(self, path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=self.batch_rows):
+            yield from batch.to_pylist()
+
+    def _iter_jsonl(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _utterances(self, record):
+        """(speaker, text) pairs from any of the medical_dialog layouts"""
+        if 'utterances' in record:
+            for utterance in record['utterances'] or []:
+                if isinstance(utterance, dict):
+                    yield utterance.get('speaker', ''), utterance.get('utterance', '')
+                else:
+                    match = SPEAKER_PATTERN.match(utterance)
+                    yield (match.group(1) if match else ''), SPEAKER_PATTERN.sub('', utterance)
+        elif 'dialogue_turns' in record:
+            turns = record['dialogue_turns'] or {}
+            for speaker, text in zip(turns.get('speaker', []), turns.get('utterance', [])):
+                yield (SPEAKER_LABELS[speaker] if isinstance(speaker, int) else speaker), text
+
+    def iter_documents(self):
+        for name, row_number, record in self.iter_records():
+            dialogue = record.get('dialogue_id')
+            prefix = f"medical_dialog:{dialogue}" if dialogue is not None else f"medical_dialog:{name}:{row_number}"
+            for turn, (speaker, text) in enumerate(self._utterances(record)):
+                if str(speaker).lower() != self.speaker or not text:
+                    continue
+                yield {
+                    "content": f"Medical Q&A: {text}",
+                    "source": f"{prefix}:{turn}",
+                    "type": "medical_qa"
+                }
+
+    def __iter__(self):
+        return self.iter_documents()
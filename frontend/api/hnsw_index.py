@@ -0,0 +1,304 @@
+"""
+Approximate nearest-neighbour index for the AI QA Bot backend
+A Hierarchical Navigable Small World (HNSW) graph over cosine similarity.
+Build cost is controlled by M / ef_construction and query cost by ef_search,
+which trades recall for latency.
+"""
+
+import heapq
+import json
+import math
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+from vector_store import LocalVectorStore, normalize_rows
+
+
+class HNSWIndex(LocalVectorStore):
+    """HNSW graph index with incremental inserts and save/load.
+
+    Vectors and metadata are stored exactly as in ``LocalVectorStore``; the
+    graph only changes how candidates are found at query time. Deletes leave
+    a tombstone: the node keeps routing searches but is never returned, and
+    ``rebuild`` (run by ``save``) drops tombstoned nodes for good.
+    """
+
+    def __init__(self, dimension=None, M=16, ef_construction=200, ef_search=50,
+                 seed=None, initial_capacity=1024):
+        super().__init__(dimension, initial_capacity)
+        self.M = M
+        self.max_m0 = 2 * M
+        self.ef_construction = max(ef_construction, M)
+        self.ef_search = ef_search
+        self._level_mult = 1.0 / math.log(max(M, 2))
+        self._rng = random.Random(seed)
+        self._links = []  # per node: one neighbour list per level it lives on
+        self._entry_point = None
+        self._max_level = -1
+        self._deleted = set()  # tombstoned rows
+
+    def __len__(self):
+        return self._size - len(self._deleted)
+
+    def add(self, ids: List[str], embeddings, metadata: Optional[List[Dict[str, Any]]] = None):
+        """Add vectors and link every new row into the graph.
+
+        Overwriting an existing id updates its vector and metadata in place
+        but keeps its current graph links.
+        """
+        start = self._size
+        super().add(ids, embeddings, metadata)
+        for row in range(start, self._size):
+            self._insert(row)
+
+    def delete(self, ids):
+        """Tombstone vectors by id (unknown ids are ignored); returns how many were removed.
+
+        Re-adding a deleted id inserts a new node.
+        """
+        removed = 0
+        for vector_id in ids:
+            row = self._id_to_row.pop(vector_id, None)
+            if row is not None:
+                self._deleted.add(row)
+                removed += 1
+        return removed
+
+    def rebuild(self):
+        """Drop tombstoned rows and re-link the graph over the live ones"""
+        if not self._deleted:
+            return
+        keep = np.ones(self._size, dtype=bool)
+        keep[list(self._deleted)] = False
+        self._compact(keep)
+        self.ids = [vector_id for vector_id, kept in zip(self.ids, keep) if kept]
+        self.metadata = [meta for meta, kept in zip(self.metadata, keep) if kept]
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self._size = len(self.ids)
+        self._deleted = set()
+
+        self._links = []
+        self._entry_point = None
+        self._max_level = -1
+        for row in range(self._size):
+            self._insert(row)
+
+    def _random_level(self):
+        return int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+
+    def _insert(self, row):
+        query_vector = self._vectors[row]
+        level = self._random_level()
+        self._links.append([[] for _ in range(level + 1)])
+
+        if self._entry_point is None:
+            self._entry_point = row
+            self._max_level = level
+            return
+
+        entry = self._entry_point
+        entry_score = float(self._vectors[entry] @ query_vector)
+        for layer in range(self._max_level, level, -1):
+            entry, entry_score = self._greedy_closest(query_vector, entry, entry_score, layer)
+
+        candidates = [(entry_score, entry)]
+        for layer in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(query_vector, candidates, self.ef_construction, layer)
+            max_links = self.max_m0 if layer == 0 else self.M
+            neighbours = self._select_neighbours(query_vector, found, self.M)
+            self._links[row][layer] = neighbours
+
+            for neighbour in neighbours:
+                links = self._links[neighbour][layer]
+                links.append(row)
+                if len(links) > max_links:
+                    self._links[neighbour][layer] = self._prune(neighbour, links, max_links)
+            candidates = found
+
+        if level > self._max_level:
+            self._max_level = level
+            self._entry_point = row
+
+    def _greedy_closest(self, query_vector, entry, entry_score, layer):
+        """Hill-climb to the closest node on an upper layer"""
+        improved = True
+        while improved:
+            improved = False
+            neighbours = self._links[entry][layer]
+            if not neighbours:
+                break
+            scores = self._vectors[neighbours] @ query_vector
+            best = int(np.argmax(scores))
+            if scores[best] > entry_score:
+                entry, entry_score = neighbours[best], float(scores[best])
+                improved = True
+        return entry, entry_score
+
+    def _search_layer(self, query_vector, entry_points, ef, layer, skip=frozenset()):
+        """Best-first beam search on one layer; returns (score, node) best first.
+
+        Nodes in ``skip`` are traversed but never returned.
+        """
+        visited = set(node for _, node in entry_points)
+        candidates = [(-score, node) for score, node in entry_points]
+        heapq.heapify(candidates)
+        results = [(score, node) for score, node in entry_points if node not in skip]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if len(results) >= ef and -negative_score < results[0][0]:
+                break
+
+            neighbours = [n for n in self._links[node][layer] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+
+            scores = self._vectors[neighbours] @ query_vector
+            for neighbour, score in zip(neighbours, scores.tolist()):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbour))
+                    if neighbour in skip:
+                        continue
+                    heapq.heappush(results, (score, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbours(self, base_vector, candidates, max_links):
+        """Diversity heuristic from the HNSW paper.
+
+        A candidate is kept only if it is closer to the base vector than to
+        any neighbour already kept; the remaining slots are then filled with
+        the closest pruned candidates so nodes keep a useful degree.
+        """
+        if len(candidates) <= 1:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        candidate_vectors = self._vectors[nodes]
+        pairwise = candidate_vectors @ candidate_vectors.T
+
+        selected = []
+        pruned = []
+        for position, (score, node) in enumerate(candidates):
+            if len(selected) >= max_links:
+                break
+            if selected and float(pairwise[position, selected].max()) >= score:
+                pruned.append(position)
+                continue
+            selected.append(position)
+
+        for position in pruned:
+            if len(selected) >= max_links:
+                break
+            selected.append(position)
+        return [nodes[position] for position in selected]
+
+    def _prune(self, node, links, max_links):
+        base_vector = self._vectors[node]
+        scores = self._vectors[links] @ base_vector
+        order = np.argsort(-scores)
+        candidates = [(float(scores[i]), links[i]) for i in order]
+        return self._select_neighbours(base_vector, candidates, max_links)
+
+    def _search(self, query_vector, top_k, ef_search):
+        ef = max(ef_search, top_k)
+        entry = self._entry_point
+        entry_score = float(self._vectors[entry] @ query_vector)
+        for layer in range(self._max_level, 0, -1):
+            entry, entry_score = self._greedy_closest(query_vector, entry, entry_score, layer)
+
+        found = self._search_layer(query_vector, [(entry_score, entry)], ef, 0, self._deleted)[:top_k]
+        indices = np.array([node for _, node in found], dtype=np.int64)
+        scores = np.array([score for score, _ in found], dtype=np.float32)
+        return indices, scores
+
+    def _top_k(self, query_vector, top_k):
+        return self._search(query_vector, top_k, self.ef_search)
+
+    def _top_k_many(self, query_matrix, top_k):
+        return [self._search(query_vector, top_k, self.ef_search) for query_vector in query_matrix]
+
+    def query(self, vector, top_k=5, include_metadata=True, ef_search=None, **kwargs):
+        """Approximate cosine top-k; ``ef_search`` overrides the index default"""
+        if self._entry_point is None:
+            return {'matches': []}
+        query_vector = normalize_rows(vector)
+        indices, scores = self._search(query_vector, top_k, ef_search or self.ef_search)
+        return {
+            'matches': [self._match(row, score, include_metadata) for row, score in zip(indices, scores)]
+        }
+
+    def save(self, path):
+        """Write vectors, graph and metadata to a single .npz file (tombstones are dropped first)"""
+        self.rebuild()
+        levels = np.array([len(node_links) - 1 for node_links in self._links], dtype=np.int32)
+        link_counts = []
+        link_data = []
+        for node_links in self._links:
+            for links in node_links:
+                link_counts.append(len(links))
+                link_data.extend(links)
+
+        params = {
+            'M': self.M,
+            'ef_construction': self.ef_construction,
+            'ef_search': self.ef_search,
+            'entry_point': self._entry_point,
+            'max_level': self._max_level,
+            'ids': self.ids,
+            'metadata': self.metadata,
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                vectors=self.vectors,
+                levels=levels,
+                link_counts=np.array(link_counts, dtype=np.int32),
+                link_data=np.array(link_data, dtype=np.int64),
+                params=np.array(json.dumps(params)),
+            )
+
+    @classmethod
+    def load(cls, path, ef_search=None):
+        """Load an index written by ``save``"""
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data['params']))
+            vectors = data['vectors']
+            levels = data['levels']
+            link_counts = data['link_counts']
+            link_data = data['link_data'].tolist()
+
+        index = cls(
+            dimension=vectors.shape[1],
+            M=params['M'],
+            ef_construction=params['ef_construction'],
+            ef_search=ef_search or params['ef_search'],
+            initial_capacity=max(1, vectors.shape[0]),
+        )
+        index._vectors[:vectors.shape[0]] = vectors
+        index._size = vectors.shape[0]
+        index.ids = params['ids']
+        index.metadata = params['metadata']
+        index._id_to_row = {vector_id: row for row, vector_id in enumerate(index.ids)}
+
+        position = 0
+        count_index = 0
+        for level in levels.tolist():
+            node_links = []
+            for _ in range(level + 1):
+                count = int(link_counts[count_index])
+                node_links.append(link_data[position:position + count])
+                position += count
+                count_index += 1
+            index._links.append(node_links)
+
+        index._entry_point = params['entry_point']
+        index._max_level = params['max_level']
+        return index
@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+"""
+Streaming, resumable ingestion pipeline for the AI QA Bot knowledge indexes
+Documents flow read (generator) -> chunk -> batched embedding -> parallel
+upsert, with bounded queues between the stages for backpressure, retries
+with exponential backoff around every remote call, and a checkpoint file so
+an interrupted run over a large corpus resumes where it stopped.
+
+Chunk ids are derived from the source and a hash of the chunk text, and a
+manifest records what is indexed, so re-running over an edited corpus only
+embeds new or changed chunks and deletes the ones that disappeared.
+
+Usage:
+    python ingest.py --bot business docs/ --checkpoint business.ckpt.json
+    python ingest.py --bot healthcare data/dialogs.jsonl --output healthcare.vec
+    python ingest.py --bot business docs/ --prune-missing   # also drop deleted files
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from vector_store import LocalVectorStore
+from vector_file import MappedVectorStore, write_vector_file
+
+TEXT_EXTENSIONS = ('.txt', '.md')
+RECORD_EXTENSIONS = ('.jsonl', '.json')
+STATE_SUFFIXES = ('.checkpoint.json', '.manifest.json')  # written by this script, never ingested
+
+
+def iter_paths(inputs):
+    """Files under the given files/directories, in a stable order"""
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(TEXT_EXTENSIONS + RECORD_EXTENSIONS) and not name.endswith(STATE_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_documents(inputs, default_type="general"):
+    """Yield {content, source, type} records lazily from text, JSONL and JSON files"""
+    for path in iter_paths(inputs):
+        if path.endswith('.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if line.strip():
+                        record = json.loads(line)
+                        yield {
+                            "content": record.get('content', ''),
+                            "source": record.get('source') or f"{path}:{line_number}",
+                            "type": record.get('type', default_type)
+                        }
+        elif path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            for position, record in enumerate(records):
+                yield {
+                    "content": record.get('content', ''),
+                    "source": record.get('source') or f"{path}:{position}",
+                    "type": record.get('type', default_type)
+                }
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield {"content": f.read(), "source": path, "type": default_type}
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def make_splitter(chunk_size=1000, chunk_overlap=200, separators=None, tokenizer=None):
+    """Function mapping text to the (start, end) offsets of its chunks.
+
+    Sizes are in tokens of the ``tokenizer`` tiktoken encoding when one is
+    given, otherwise in characters.
+    """
+    if tokenizer:
+        from token_chunker import TokenChunker
+        return TokenChunker(chunk_size, chunk_overlap, tokenizer, separators).spans
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=separators or ["\n\n", "\n", " ", ""]
+    )
+
+    def spans(text):
+        found = []
+        index = -1
+        for chunk in splitter.split_text(text):
+            index = text.find(chunk, index + 1)
+            if index == -1:
+                raise ValueError("Splitter returned text that is not part of the document")
+            found.append((index, index + len(chunk)))
+        return found
+
+    return spans
+
+
+def chunks_from_spans(document, content, spans, digests=None):
+    """Build {id, text, metadata} chunks from offsets into ``content``.
+
+    A chunk id is its source plus a prefix of the chunk's content hash, so an
+    unchanged chunk keeps its id however the rest of the document is edited.
+    Repeats of the same text in one document (boilerplate, disclaimers) get
+    an occurrence suffix ("::<hash>-1", "-2", ...) so every id is unique.
+    """
+    chunks = []
+    occurrences = {}
+    for i, (start, end) in enumerate(spans):
+        text = content[start:end]
+        digest = digests[i] if digests else content_hash(text)
+        chunk_id = f"{document['source']}::{digest[:16]}"
+        seen = occurrences.get(chunk_id, 0)
+        occurrences[chunk_id] = seen + 1
+        if seen:
+            chunk_id = f"{chunk_id}-{seen}"
+        chunks.append({
+            "id": chunk_id,
+            "text": text,
+            "metadata": {
+                "source": document['source'],
+                "type": document.get('type', 'general'),
+                "chunk_id": i,
+                "total_chunks": len(spans),
+                "content_hash": digest
+            }
+        })
+    return chunks
+
+
+def make_chunker(chunk_size=1000, chunk_overlap=200, separators=None, tokenizer=None):
+    """Function splitting one document into {id, text, metadata} chunks"""
+    split = make_splitter(chunk_size, chunk_overlap, separators, tokenizer)
+
+    def chunk_document(document):
+        content = document.get('content', '')
+        if not content.strip():
+            return []
+        return chunks_from_spans(document, content, split(content))
+
+    return chunk_document
+
+
+def iter_chunks(documents, chunk_size=1000, chunk_overlap=200, separators=None, tokenizer=None):
+    """Split each document as it arrives; yields {id, text, metadata}"""
+    chunk_document = make_chunker(chunk_size, chunk_overlap, separators, tokenizer)
+    for document in documents:
+        yield from chunk_document(document)
+
+
+_worker_splitter = None
+_worker_clean_fn = None
+
+
+def _init_chunk_worker(chunk_size, chunk_overlap, separators, tokenizer, clean_fn):
+    global _worker_splitter, _worker_clean_fn
+    _worker_splitter = make_splitter(chunk_size, chunk_overlap, separators, tokenizer)
+    _worker_clean_fn = clean_fn
+
+
+def _clean_document(document, clean_fn):
+    if clean_fn is None:
+        return document
+    return {**document, "content": clean_fn(document.get('content', ''))}
+
+
+def _chunk_group(documents):
+    """Worker side: clean and split a group of documents.
+
+    Returns offsets and hashes rather than chunk texts, so overlapping text is
+    never pickled back; the cleaned content is only returned if it changed.
+    """
+    results = []
+    for document in documents:
+        content = document.get('content', '')
+        cleaned = _worker_clean_fn(content) if _worker_clean_fn else content
+        spans = _worker_splitter(cleaned) if cleaned.strip() else []
+        digests = [content_hash(cleaned[start:end]) for start, end in spans]
+        results.append((cleaned if cleaned != content else None, spans, digests))
+    return results
+
+
+def _chunks_from_results(group, results):
+    for document, (cleaned, spans, digests) in zip(group, results):
+        content = document.get('content', '') if cleaned is None else cleaned
+        yield document, chunks_from_spans(document, content, spans, digests)
+
+
+def chunk_documents(documents, chunk_size=1000, chunk_overlap=200, separators=None, tokenizer=None,
+                    clean_fn=None, processes=1, group_size=64):
+    """Yield (document, chunks) pairs in input order.
+
+    With ``processes`` > 1, cleaning and splitting run in a process pool on
+    groups of ``group_size`` documents. Only a few groups per process are in
+    flight at once, so a large corpus is never read ahead into memory.
+    ``clean_fn`` maps content to cleaned content and must be picklable.
+    """
+    if processes <= 1:
+        chunk_document = make_chunker(chunk_size, chunk_overlap, separators, tokenizer)
+        for document in documents:
+            yield document, chunk_document(_clean_document(document, clean_fn))
+        return
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_chunk_worker,
+                             initargs=(chunk_size, chunk_overlap, separators, tokenizer, clean_fn)) as pool:
+        in_flight = deque()
+        for group in iter_batches(documents, group_size):
+            in_flight.append((group, pool.submit(_chunk_group, group)))
+            if len(in_flight) >= processes * 2:
+                group, future = in_flight.popleft()
+                yield from _chunks_from_results(group, future.result())
+        while in_flight:
+            group, future = in_flight.popleft()
+            yield from _chunks_from_results(group, future.result())
+
+
+def iter_batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def with_retries(func, *args, attempts=5, base_delay=0.5, max_delay=30.0, description="call"):
+    """Call func, retrying failures with jittered exponential backoff"""
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            print(f"⚠️  {description} failed ({e}), retry {attempt}/{attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class Checkpoint:
+    """Which batches of a run are safely stored, as a watermark plus out-of-order extras.
+
+    The checkpoint only applies to a run with the same fingerprint (inputs and
+    chunking/batching settings), since batch numbers depend on both.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.watermark = 0  # every batch below this is done
+        self.extras = set()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('fingerprint') == fingerprint:
+                self.watermark = state['watermark']
+                self.extras = set(state['extras'])
+                print(f"🔄 Resuming from checkpoint: {self.completed_count()} batches already stored")
+            else:
+                print("⚠️  Checkpoint is from a different run configuration, starting from scratch")
+
+    def is_done(self, sequence):
+        return sequence < self.watermark or sequence in self.extras
+
+    def mark_done(self, sequences):
+        self.extras.update(sequences)
+        while self.watermark in self.extras:
+            self.extras.remove(self.watermark)
+            self.watermark += 1
+
+    def completed_count(self):
+        return self.watermark + len(self.extras)
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'watermark': self.watermark,
+                'extras': sorted(self.extras),
+                'updated_at': time.time()
+            }, f)
+        os.replace(temp_path, self.path)
+
+
+class IndexManifest:
+    """What is indexed per source: the document hash and the ids of its chunks.
+
+    ``changed_chunks`` filters a document stream down to the chunks that need
+    embedding and remembers the new state; ``stale_ids`` lists what should be
+    deleted; nothing is written until ``commit`` after the index is updated.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.sources = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == self.VERSION:
+                self.sources = state['sources']
+            else:
+                print("⚠️  Manifest has an unknown version, re-indexing everything")
+        self.seen = {}
+        self.stats = {"unchanged_documents": 0, "changed_documents": 0, "new_chunks": 0, "reused_chunks": 0}
+
+    def digest(self):
+        """Hash of the committed manifest, for tying checkpoints to it"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _documents_to_chunk(self, documents, force):
+        """Pass through new or changed documents, recording unchanged ones as seen"""
+        for document in documents:
+            source = document['source']
+            previous = self.sources.get(source)
+            if source in self.seen:
+                print(f"⚠️  Duplicate source {source}, later records replace earlier ones")
+            if not force and previous and previous['hash'] == content_hash(document.get('content', '')):
+                self.seen[source] = previous
+                self.stats["unchanged_documents"] += 1
+                continue
+            yield document
+
+    def changed_chunks(self, documents, chunk_documents, force=False):
+        """Yield only chunks that are not indexed yet (every chunk when ``force``).
+
+        ``chunk_documents`` maps an iterable of documents to (document, chunks)
+        pairs in order, e.g. ``functools.partial(chunk_documents, processes=8)``;
+        only new or changed documents are handed to it.
+        """
+        for document, chunks in chunk_documents(self._documents_to_chunk(documents, force)):
+            source = document['source']
+            previous = self.sources.get(source)
+            self.stats["changed_documents"] += 1
+            indexed = set() if force or not previous else set(previous['chunks'])
+            self.seen[source] = {"hash": content_hash(document.get('content', '')),
+                                 "chunks": [chunk['id'] for chunk in chunks]}
+            for chunk in chunks:
+                if chunk['id'] in indexed:
+                    self.stats["reused_chunks"] += 1
+                    continue
+                self.stats["new_chunks"] += 1
+                yield chunk
+
+    def stale_ids(self, prune_missing=False):
+        """Indexed chunk ids no longer produced by their source.
+
+        Sources absent from this run are only considered stale with
+        ``prune_missing``, since a run may cover part of the corpus.
+        """
+        stale = []
+        for source, entry in self.sources.items():
+            if source in self.seen:
+                current = set(self.seen[source]['chunks'])
+                stale.extend(chunk_id for chunk_id in entry['chunks'] if chunk_id not in current)
+            elif prune_missing:
+                stale.extend(entry['chunks'])
+        return stale
+
+    def commit(self, prune_missing=False):
+        sources = {} if prune_missing else dict(self.sources)
+        sources.update(self.seen)
+        self.sources = sources
+        self.seen = {}
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'sources': self.sources, 'updated_at': time.time()}, f)
+        os.replace(temp_path, self.path)
+
+
+class PineconeSink:
+    delete_batch_size = 1000  # Pinecone's limit on ids per delete request
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors):
+        self.index.upsert(vectors=vectors)
+
+    def delete(self, ids):
+        for start in range(0, len(ids), self.delete_batch_size):
+            self.index.delete(ids=ids[start:start + self.delete_batch_size])
+
+
+class VectorFileSink:
+    """Accumulates vectors in memory and rewrites a memory-mappable vector file on flush"""
+
+    def __init__(self, path, dtype="float32", manifest=None):
+        self.path = path
+        self.dtype = dtype
+        self.manifest = manifest or {}
+        self.store = LocalVectorStore()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            existing = MappedVectorStore(path)
+            if len(existing):
+                self.store.add(existing.ids, np.asarray(existing.vectors, dtype=np.float32), existing.metadata)
+            existing.close()
+
+    def upsert(self, vectors):
+        with self._lock:
+            self.store.upsert(vectors)
+
+    def delete(self, ids):
+        with self._lock:
+            self.store.delete(ids)
+
+    def flush(self):
+        with self._lock:
+            if len(self.store) or os.path.exists(self.path):
+                write_vector_file(self.path, self.store, dtype=self.dtype, manifest=self.manifest)
+
+
+class IngestionPipeline:
+    """Embeds and upserts a stream of chunks with bounded memory.
+
+    ``embed_fn`` maps a list of texts to embeddings and ``sink`` has an
+    ``upsert(vectors)`` method taking (id, values, metadata) tuples, plus an
+    optional ``flush()`` that must persist everything upserted so far.
+    """
+
+    def __init__(self, embed_fn, sink, batch_size=64, embed_workers=2, upsert_workers=4,
+                 queue_size=8, checkpoint=None, retry_attempts=5, flush_interval=10.0):
+        self.embed_fn = embed_fn
+        self.sink = sink
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.upsert_workers = upsert_workers
+        self.queue_size = queue_size
+        self.checkpoint = checkpoint
+        self.retry_attempts = retry_attempts
+        self.flush_interval = flush_interval
+
+    def run(self, chunks):
+        """Ingest an iterable of {id, text, metadata} chunks; returns run statistics"""
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        stats = {"batches": 0, "chunks": 0, "skipped_batches": 0, "failed": False}
+        stats_lock = threading.Lock()
+        flush_lock = threading.Lock()
+        pending = []  # upserted batch numbers not yet covered by a checkpoint
+        last_flush = [time.monotonic()]
+        start = time.monotonic()
+
+        def fail(error):
+            errors.append(error)
+            stop.set()
+
+        def flush():
+            with flush_lock:
+                with stats_lock:
+                    sequences = list(pending)
+                    pending.clear()
+                if hasattr(self.sink, 'flush'):
+                    self.sink.flush()
+                if self.checkpoint:
+                    self.checkpoint.mark_done(sequences)
+                    self.checkpoint.save()
+                last_flush[0] = time.monotonic()
+                elapsed = max(time.monotonic() - start, 1e-9)
+                print(f"🔄 {stats['chunks']} chunks stored ({stats['chunks'] / elapsed:.1f}/s)")
+
+        def produce():
+            try:
+                for sequence, batch in enumerate(iter_batches(chunks, self.batch_size)):
+                    if stop.is_set():
+                        break
+                    if self.checkpoint and self.checkpoint.is_done(sequence):
+                        stats["skipped_batches"] += 1
+                        continue
+                    embed_queue.put((sequence, batch))  # blocks when embedding falls behind
+            except Exception as e:
+                fail(e)
+
+        def embed():
+            while True:
+                item = embed_queue.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    continue  # keep draining so the producer can finish
+                sequence, batch = item
+                try:
+                    embeddings = with_retries(
+                        self.embed_fn, [chunk['text'] for chunk in batch],
+                        attempts=self.retry_attempts, description=f"Embedding batch {sequence}"
+                    )
+                except Exception as e:
+                    fail(e)
+                    continue
+                vectors = [
+                    (chunk['id'], list(embedding), {**chunk['metadata'], 'text': chunk['text']})
+                    for chunk, embedding in zip(batch, embeddings)
+                ]
+                upsert_queue.put((sequence, vectors))
+
+        def upsert():
+            while True:
+                item = upsert_queue.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    continue
+                sequence, vectors = item
+                try:
+                    with_retries(self.sink.upsert, vectors,
+                                 attempts=self.retry_attempts, description=f"Upsert of batch {sequence}")
+                except Exception as e:
+                    fail(e)
+                    continue
+                with stats_lock:
+                    pending.append(sequence)
+                    stats["batches"] += 1
+                    stats["chunks"] += len(vectors)
+                if time.monotonic() - last_flush[0] >= self.flush_interval and not flush_lock.locked():
+                    flush()
+
+        producer = threading.Thread(target=produce, name="ingest-read")
+        embedders = [threading.Thread(target=embed, name=f"ingest-embed-{i}") for i in range(self.embed_workers)]
+        upserters = [threading.Thread(target=upsert, name=f"ingest-upsert-{i}") for i in range(self.upsert_workers)]
+        for thread in [producer] + embedders + upserters:
+            thread.start()
+
+        producer.join()
+        for _ in embedders:
+            embed_queue.put(None)
+        for thread in embedders:
+            thread.join()
+        for _ in upserters:
+            upsert_queue.put(None)
+        for thread in upserters:
+            thread.join()
+
+        # Persist whatever did get stored, even when the run is aborting
+        flush()
+        stats["seconds"] = round(time.monotonic() - start, 2)
+        if errors:
+            stats["failed"] = True
+            stats["error"] = str(errors[0])
+        return stats
+
+
+def run_fingerprint(inputs, **settings):
+    """Identify a run by its inputs and the settings that determine batch numbering"""
+    payload = json.dumps({"inputs": [os.path.abspath(path) for path in inputs], **settings}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def make_embed_fn(config):
+    """Document embedding function for a bot config, using the shared client registry"""
+    from client_registry import get_client_registry
+    if config.use_sentence_transformers:
+        model = get_client_registry().sentence_transformer(config.sentence_transformer_model)
+        return lambda texts: model.encode(texts).tolist()
+    if not config.gemini_api_key:
+        raise ValueError("GEMINI_API_KEY is required unless USE_SENTENCE_TRANSFORMERS is enabled")
+    model = get_client_registry().gemini_embeddings(config.embedding_model, config.gemini_api_key)
+    return model.embed_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Files or directories (.txt, .md, .jsonl, .json)")
+    parser.add_argument("--bot", choices=["business", "healthcare"], default="business")
+    parser.add_argument("--output", help="Write a memory-mapped vector file instead of upserting to Pinecone")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: next to the output / named after the index)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--manifest", help="Index manifest (default: named after the output / index)")
+    parser.add_argument("--full", action="store_true", help="Re-embed every chunk, not just new or changed ones")
+    parser.add_argument("--prune-missing", action="store_true",
+                        help="Delete chunks of sources that are not part of this run")
+    parser.add_argument("--type", default="general", help="Document type for records that do not set one")
+    parser.add_argument("--dataset", choices=["medical_dialog"],
+                        help="Read the inputs as dataset shards (.arrow, .parquet, .jsonl) instead of documents")
+    parser.add_argument("--processes", type=int, default=1, help="Processes for cleaning and chunking")
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--chunk-overlap", type=int)
+    parser.add_argument("--tokenizer", default=os.getenv('CHUNK_TOKENIZER'),
+                        help="tiktoken encoding (e.g. cl100k_base); chunk sizes are then in tokens, not characters")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--embed-workers", type=int, default=2)
+    parser.add_argument("--upsert-workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=5)
+    args = parser.parse_args()
+
+    # Only the config classes are needed from the server, not its bots
+    os.environ.setdefault('BOT_WARMUP', 'lazy')
+    import server
+    config = server.Config() if args.bot == "business" else server.HealthcareConfig()
+    if args.tokenizer:
+        chunk_size = args.chunk_size or config.chunk_tokens
+        chunk_overlap = args.chunk_overlap or config.chunk_overlap_tokens
+    else:
+        chunk_size = args.chunk_size or config.chunk_size
+        chunk_overlap = args.chunk_overlap or config.chunk_overlap
+    separators = ["\n\n", "\n", ". ", " ", ""] if args.bot == "healthcare" else None
+
+    if args.output:
+        sink = VectorFileSink(args.output, dtype=config.index_dtype, manifest={
+            'embedding_model': config.sentence_transformer_model if config.use_sentence_transformers else config.embedding_model,
+            'index_name': config.index_name
+        })
+        target = args.output
+    else:
+        if not config.pinecone_api_key:
+            parser.error("PINECONE_API_KEY is not set; use --output to build a local vector file")
+        from client_registry import get_client_registry
+        sink = PineconeSink(get_client_registry().pinecone_index(config.pinecone_api_key, config.index_name))
+        target = config.index_name
+
+    manifest = IndexManifest(args.manifest or f"{target}.manifest.json")
+    checkpoint_path = args.checkpoint or f"{target}.checkpoint.json"
+    if args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    # Which chunks get batched depends on the manifest, so a checkpoint only
+    # resumes a run against the same manifest
+    checkpoint = Checkpoint(checkpoint_path, run_fingerprint(
+        args.inputs, target=target, chunk_size=chunk_size, chunk_overlap=chunk_overlap, tokenizer=args.tokenizer,
+        batch_size=args.batch_size, type=args.type, full=args.full, manifest=manifest.digest()
+    ))
+
+    pipeline = IngestionPipeline(
+        make_embed_fn(config), sink,
+        batch_size=args.batch_size,
+        embed_workers=args.embed_workers,
+        upsert_workers=args.upsert_workers,
+        queue_size=args.queue_size,
+        checkpoint=checkpoint,
+        retry_attempts=args.retries
+    )
+    print(f"📥 Ingesting {', '.join(args.inputs)} into {target}...")
+    if args.dataset == "medical_dialog":
+        from healthcare_loader import HealthcareDatasetLoader, clean_medical_text
+        documents, clean_fn = HealthcareDatasetLoader(args.inputs).iter_documents(), clean_medical_text
+    else:
+        documents, clean_fn = iter_documents(args.inputs, args.type), None
+    chunks = manifest.changed_chunks(
+        documents,
+        functools.partial(chunk_documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                          separators=separators, tokenizer=args.tokenizer, clean_fn=clean_fn,
+                          processes=args.processes),
+        force=args.full
+    )
+    stats = pipeline.run(chunks)
+
+    if stats["failed"]:
+        print(f"❌ Ingestion stopped: {stats['error']}")
+        print(f"   {stats['chunks']} chunks stored; re-run the same command to resume")
+        sys.exit(1)
+
+    # Only drop old chunks once their replacements are stored
+    stale = manifest.stale_ids(prune_missing=args.prune_missing)
+    if stale:
+        with_retries(sink.delete, stale, attempts=args.retries, description="Deleting stale chunks")
+        if hasattr(sink, 'flush'):
+            sink.flush()
+    manifest.commit(prune_missing=args.prune_missing)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    changes = manifest.stats
+    print(f"✅ Stored {stats['chunks']} chunks in {stats['batches']} batches "
+          f"({stats['skipped_batches']} batches already done) in {stats['seconds']}s")
+    print(f"   {changes['changed_documents']} new or changed documents, {changes['unchanged_documents']} unchanged; "
+          f"{changes['reused_chunks']} chunks reused, {len(stale)} stale chunks deleted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Local intent classifier for GreetingHandler
+Combines a compiled keyword matcher with nearest-centroid classification
+over embeddings of labelled examples. Each result carries a confidence so
+callers only escalate to the LLM when the local answer is uncertain.
+"""
+
+import re
+import threading
+import numpy as np
+
+from vector_store import normalize_rows
+
+INTENTS = ("greeting", "farewell", "thank_you", "about_bot", "other")
+
+INTENT_KEYWORDS = {
+    "greeting": ["hello", "hi", "hey", "hiya", "howdy", "greetings", "good morning", "good afternoon", "good evening"],
+    "farewell": ["bye", "goodbye", "good bye", "see you", "see ya", "farewell", "take care", "have a good day"],
+    "thank_you": ["thank", "thanks", "thank you", "thx", "appreciate", "appreciated", "much appreciated"],
+    "about_bot": ["how are you", "what are you", "who are you", "what can you do", "are you a bot",
+                  "are you human"],
+}
+
+INTENT_EXAMPLES = {
+    "greeting": ["hello", "hi there", "hey", "good morning", "good evening", "hello, anyone there?", "hey there, hi"],
+    "farewell": ["bye", "goodbye", "see you later", "that's all, bye", "talk to you later", "I'm done, take care"],
+    "thank_you": ["thanks", "thank you so much", "thanks a lot, that helped", "I appreciate it", "great, thanks!"],
+    "about_bot": ["who are you?", "what can you do?", "are you a real person?", "what are you able to help with?",
+                  "how are you today?", "what kind of assistant are you?"],
+    "other": ["what services do you offer?", "how much does a mobile app cost?", "tell me about your company",
+              "what are the symptoms of diabetes?", "how can I lower my blood pressure?",
+              "do you build e-commerce websites?", "what causes heart disease?", "what is your hourly rate?",
+              "is hypertension dangerous?", "can you migrate us to AWS?"],
+}
+
+# Words that do not change a short conversational message into a real question.
+# Question words (how, what, price, cost, ...) must never be added here.
+FILLER_WORDS = frozenset("there so much very a lot again all everyone anyone guys bot assistant ok okay great "
+                         "for the help that's thats it is was you your me and".split())
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+# Intents whose keywords are questions themselves ("who are you?")
+QUESTION_INTENTS = frozenset(["about_bot"])
+
+
+def _compile_keywords(phrases):
+    alternatives = sorted((re.escape(phrase) for phrase in phrases), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+class LocalIntentClassifier:
+    """Classify chat messages into greeting / farewell / thank_you / about_bot / other.
+
+    ``embed_fn`` maps a list of texts to embeddings (e.g.
+    ``EmbeddingManager.embed_queries``); without it only keywords are used.
+    """
+
+    def __init__(self, embed_fn=None, temperature=0.05):
+        self.embed_fn = embed_fn
+        self.temperature = temperature
+        self._patterns = {intent: _compile_keywords(phrases) for intent, phrases in INTENT_KEYWORDS.items()}
+        self._centroids = None
+        self._centroid_labels = list(INTENT_EXAMPLES)
+        self._lock = threading.Lock()
+
+    def _build_centroids(self):
+        """Embed the labelled examples once, on first use"""
+        with self._lock:
+            if self._centroids is not None or self.embed_fn is None:
+                return
+            texts = [text for intent in self._centroid_labels for text in INTENT_EXAMPLES[intent]]
+            embeddings = normalize_rows(self.embed_fn(texts))
+            centroids = []
+            position = 0
+            for intent in self._centroid_labels:
+                count = len(INTENT_EXAMPLES[intent])
+                centroids.append(embeddings[position:position + count].mean(axis=0))
+                position += count
+            self._centroids = normalize_rows(np.stack(centroids))
+
+    def match_keywords(self, text):
+        """Return (intent, words left once keywords and filler are removed)"""
+        lowered = text.lower().strip()
+        for intent, pattern in self._patterns.items():
+            if pattern.search(lowered):
+                remainder = [word for word in WORD_PATTERN.findall(pattern.sub(" ", lowered))
+                             if word not in FILLER_WORDS]
+                return intent, remainder
+        return None, WORD_PATTERN.findall(lowered)
+
+    def classify(self, text):
+        """Return (intent, confidence in [0, 1])"""
+        keyword_intent, remainder = self.match_keywords(text)
+
+        # A keyword with nothing but filler around it is unambiguous; anything
+        # else (e.g. "hi, how much is an app?") goes to the centroids / LLM
+        if keyword_intent and not remainder and (
+                keyword_intent in QUESTION_INTENTS or not text.rstrip().endswith("?")):
+            return keyword_intent, 0.95
+
+        if self.embed_fn is not None:
+            try:
+                if self._centroids is None:
+                    self._build_centroids()
+                embedding = normalize_rows(self.embed_fn([text])[0])
+                similarities = self._centroids @ embedding
+                weights = np.exp((similarities - similarities.max()) / self.temperature)
+                probabilities = weights / weights.sum()
+                best = int(np.argmax(probabilities))
+                return self._centroid_labels[best], float(probabilities[best])
+            except Exception as e:
+                print(f"Local intent classification error: {e}")
+
+        if keyword_intent:
+            # Keyword plus a real question, e.g. "hi, how much is an app?": answer the question
+            return "other", 0.5
+        return "other", 0.8
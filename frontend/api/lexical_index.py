@@ -0,0 +1,87 @@
+"""
+BM25 inverted index for lexical retrieval in the AI QA Bot backend
+Postings, document lengths and IDF are computed once at load time, so a
+query only touches the posting lists of its own terms.
+"""
+
+import heapq
+import math
+import re
+from typing import List, Dict, Any, Iterable, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,'][a-z0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its me my of on or
+our that the their this to us was we what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-word characters and drop stop words.
+
+    Numbers keep their separators ("5,000", "120/80" -> "120", "80") so
+    prices and measurements can be matched exactly.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed sequence of ``{'content', 'source', ...}`` documents.
+
+    ``documents`` may be any iterable (e.g. a generator over a vector file),
+    since only the postings are kept; results refer to documents by position.
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]], text_key='content', k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> list of (doc index, term frequency)
+        self.doc_lengths = []
+
+        for doc_index, doc in enumerate(documents):
+            tokens = tokenize(doc.get(text_key, ''))
+            self.doc_lengths.append(len(tokens))
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, frequency in frequencies.items():
+                self.postings.setdefault(token, []).append((doc_index, frequency))
+
+        total_docs = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / total_docs) if total_docs else 0.0
+        self.idf = {
+            term: math.log(1.0 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        # Per-document BM25 length normalization, precomputed once
+        self._length_norm = [
+            self.k1 * (1.0 - self.b + self.b * length / self.avg_doc_length) if self.avg_doc_length else self.k1
+            for length in self.doc_lengths
+        ]
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def search(self, query: str, top_k=5, normalize=True) -> List[Tuple[int, float]]:
+        """Return (doc index, score) pairs for the top_k documents, best first.
+
+        With ``normalize`` the score is divided by the best score any
+        document could reach for these query terms, giving a value in [0, 1].
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not terms:
+            return []
+
+        scores = {}
+        for term in terms:
+            idf = self.idf[term]
+            for doc_index, frequency in self.postings[term]:
+                contribution = idf * frequency * (self.k1 + 1.0) / (frequency + self._length_norm[doc_index])
+                scores[doc_index] = scores.get(doc_index, 0.0) + contribution
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        if normalize:
+            ceiling = sum(self.idf[term] for term in terms) * (self.k1 + 1.0)
+            best = [(doc_index, score / ceiling) for doc_index, score in best]
+        return best
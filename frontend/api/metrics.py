@@ -0,0 +1,289 @@
+"""
+Request-path instrumentation for the AI QA Bot backend
+Stage timers, LLM call/token counters and fallback counters, kept in a small
+in-process registry and rendered in the Prometheus text format by
+/api/metrics. Recording is a dict lookup and a bisect under a lock, so it is
+cheap enough to leave on for every request.
+
+The bot and stage a piece of work belongs to travel in context variables, so
+LLM calls made deep inside an agent (or on a pool thread started with
+``submit_in_context``) are attributed to the right bot and stage.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24)
+TOKEN_BUCKETS = (0, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for Gemini models)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labelvalues, (counts, total, count) in sorted(series.items()):
+            labels = tuple(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_callback(self, callback):
+        """``callback()`` returns (name, kind, documentation, [(labels dict, value)]) tuples at scrape time"""
+        self._callbacks.append(callback)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for callback in self._callbacks:
+            try:
+                families = list(callback())
+            except Exception as e:
+                print(f"Metrics callback error: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "qa_stage_duration_seconds", "Time spent in each stage of answering a question (stages nest)", ["bot", "stage"])
+REQUEST_SECONDS = REGISTRY.histogram(
+    "qa_request_duration_seconds", "End-to-end time of a bot answering one question", ["bot", "outcome"])
+REQUEST_LLM_CALLS = REGISTRY.histogram(
+    "qa_request_llm_calls", "LLM calls made while answering one question", ["bot"], buckets=COUNT_BUCKETS)
+REQUEST_LLM_TOKENS = REGISTRY.histogram(
+    "qa_request_llm_tokens", "Estimated LLM tokens (prompt + completion) for one question", ["bot"], buckets=TOKEN_BUCKETS)
+LLM_CALLS = REGISTRY.counter("qa_llm_calls_total", "LLM calls", ["bot", "stage"])
+LLM_TOKENS = REGISTRY.counter("qa_llm_tokens_total", "Estimated LLM tokens", ["bot", "stage", "kind"])
+FALLBACKS = REGISTRY.counter("qa_fallback_total", "Fallback path activations", ["bot", "path"])
+CONTEXT_TOKENS = REGISTRY.histogram(
+    "qa_context_tokens", "Estimated tokens of retrieved context packed into one prompt", ["bot"], buckets=TOKEN_BUCKETS)
+CONTEXT_TOKENS_SAVED = REGISTRY.counter(
+    "qa_context_tokens_saved_total", "Estimated context tokens left out of prompts by the context packer", ["bot", "reason"])
+
+# (bot, stage) of the innermost running stage, and the RequestStats of the current question
+_current_stage = contextvars.ContextVar("qa_current_stage", default=("unknown", "other"))
+_current_request = contextvars.ContextVar("qa_current_request", default=None)
+
+
+class RequestStats:
+    def __init__(self, bot):
+        self.bot = bot
+        self.llm_calls = 0
+        self.llm_tokens = 0
+        self._lock = threading.Lock()  # sub-questions record from several threads
+
+    def add_llm_call(self, tokens):
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_tokens += tokens
+
+
+class stage:
+    """Time a block as ``name`` for ``bot``; LLM calls inside it are attributed to that stage.
+
+    A plain class rather than @contextmanager: it runs several times per request.
+    """
+
+    __slots__ = ("bot", "name", "_token", "_start")
+
+    def __init__(self, bot, name):
+        self.bot = bot
+        self.name = name
+
+    def __enter__(self):
+        self._token = _current_stage.set((self.bot, self.name))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_SECONDS.observe(time.perf_counter() - self._start, self.bot, self.name)
+        _current_stage.reset(self._token)
+        return False
+
+
+def _bot_of(instance):
+    config = getattr(instance, 'config', None)
+    return getattr(config, 'bot_name', None) or _current_stage.get()[0]
+
+
+def timed_stage(name):
+    """Method decorator timing every call as stage ``name``, for sync and async methods alike.
+
+    The bot label comes from ``self.config.bot_name``.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with stage(_bot_of(self), name):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with stage(_bot_of(self), name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def track_request(bot):
+    """Scope one question; yields a dict whose "outcome" the caller sets before leaving"""
+    stats = RequestStats(bot)
+    request_token = _current_request.set(stats)
+    stage_token = _current_stage.set((bot, "other"))
+    start = time.perf_counter()
+    state = {"outcome": "answer"}
+    try:
+        yield state
+    except Exception:
+        state["outcome"] = "error"
+        raise
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, bot, state["outcome"])
+        REQUEST_LLM_CALLS.observe(stats.llm_calls, bot)
+        REQUEST_LLM_TOKENS.observe(stats.llm_tokens, bot)
+        _current_stage.reset(stage_token)
+        _current_request.reset(request_token)
+
+
+def timed_request(outcome_of):
+    """Method decorator scoping each call as one question; ``outcome_of(result)`` labels its outcome"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with track_request(_bot_of(self)) as request:
+                    result = await func(self, *args, **kwargs)
+                    request["outcome"] = outcome_of(result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with track_request(_bot_of(self)) as request:
+                result = func(self, *args, **kwargs)
+                request["outcome"] = outcome_of(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def record_llm_call(prompt, completion):
+    """LLM call listener: count the call and its estimated tokens against the current bot and stage"""
+    bot, stage_name = _current_stage.get()
+    prompt_tokens = estimate_tokens(str(prompt))
+    completion_tokens = estimate_tokens(completion)
+    LLM_CALLS.inc(bot, stage_name)
+    LLM_TOKENS.inc(bot, stage_name, "prompt", amount=prompt_tokens)
+    LLM_TOKENS.inc(bot, stage_name, "completion", amount=completion_tokens)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.add_llm_call(prompt_tokens + completion_tokens)
+
+
+def record_fallback(bot, path):
+    FALLBACKS.inc(bot, path)
+
+
+def submit_in_context(executor, func, *args, **kwargs):
+    """executor.submit that keeps the caller's bot / stage / request context on the pool thread"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
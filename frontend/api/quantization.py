@@ -0,0 +1,358 @@
+"""
+Quantized embedding storage for the local vector store
+- ScalarQuantizer: per-dimension int8 codes (4x smaller than float32)
+- ProductQuantizer: 256-centroid codebooks per sub-vector, scored with
+  asymmetric distance (float query vs. coded database), 8-32x smaller
+Both can re-score the top candidates exactly against the full-precision
+vectors of a memory-mapped vector file, which stay on disk.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+from vector_store import LocalVectorStore, normalize_rows, top_k_indices
+from vector_file import MappedVectorStore
+
+BLOCK_ROWS = 16384  # rows decoded at a time so scoring never materializes the full float matrix
+
+
+class ScalarQuantizer:
+    """Per-dimension affine int8 quantization"""
+
+    method = "int8"
+    code_dtype = np.int8
+
+    def __init__(self):
+        self.offset = None
+        self.scale = None
+
+    @property
+    def is_fitted(self):
+        return self.scale is not None
+
+    def code_width(self, dimension):
+        return dimension
+
+    def fit(self, vectors):
+        # Block-wise so a memory-mapped matrix is never copied into RAM whole
+        low = high = None
+        for start in range(0, vectors.shape[0], BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            low = block.min(axis=0) if low is None else np.minimum(low, block.min(axis=0))
+            high = block.max(axis=0) if high is None else np.maximum(high, block.max(axis=0))
+        self.scale = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+        self.offset = low.astype(np.float32)
+        return self
+
+    def encode(self, vectors):
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def decode(self, codes):
+        return (codes.astype(np.float32) + 128.0) * self.scale + self.offset
+
+    def scores(self, codes, query_vector):
+        """Approximate inner products of a float query against int8 codes"""
+        weights = query_vector * self.scale
+        bias = float(query_vector @ self.offset) + 128.0 * float(weights.sum())
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], BLOCK_ROWS):
+            block = codes[start:start + BLOCK_ROWS].astype(np.float32)
+            scores[start:start + BLOCK_ROWS] = block @ weights
+        return scores + bias
+
+
+def _kmeans(data, k, iterations, rng):
+    """Plain Lloyd's k-means; returns float32 centroids"""
+    k = min(k, data.shape[0])
+    centroids = data[rng.choice(data.shape[0], k, replace=False)].copy()
+    data_norms = (data ** 2).sum(axis=1)
+    for _ in range(iterations):
+        distances = data_norms[:, None] - 2.0 * (data @ centroids.T) + (centroids ** 2).sum(axis=1)[None, :]
+        assignment = distances.argmin(axis=1)
+        sums = np.stack(
+            [np.bincount(assignment, weights=data[:, d], minlength=k) for d in range(data.shape[1])], axis=1
+        )
+        counts = np.bincount(assignment, minlength=k)
+        empty = counts == 0
+        counts[empty] = 1
+        centroids = sums / counts[:, None]
+        if empty.any():
+            centroids[empty] = data[rng.choice(data.shape[0], int(empty.sum()), replace=False)]
+    return centroids.astype(np.float32)
+
+
+def _largest_divisor_at_most(value, limit):
+    for candidate in range(min(limit, value), 0, -1):
+        if value % candidate == 0:
+            return candidate
+    return 1
+
+
+class ProductQuantizer:
+    """Product quantization with asymmetric distance computation (ADC)"""
+
+    method = "pq"
+    code_dtype = np.uint8
+
+    def __init__(self, n_subvectors=None, n_centroids=256, train_size=10000, iterations=15, seed=0):
+        if n_centroids > 256:
+            raise ValueError("n_centroids must fit in one byte (<= 256)")
+        self.n_subvectors = n_subvectors
+        self.n_centroids = n_centroids
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks = None  # (n_subvectors, n_centroids, sub_dimension)
+
+    @property
+    def is_fitted(self):
+        return self.codebooks is not None
+
+    def code_width(self, dimension):
+        return self.n_subvectors
+
+    def fit(self, vectors):
+        dimension = vectors.shape[1]
+        # Default to 4 dimensions per sub-vector: 16x smaller than float32
+        target = self.n_subvectors or max(1, dimension // 4)
+        self.n_subvectors = _largest_divisor_at_most(dimension, target)
+        sub_dimension = dimension // self.n_subvectors
+
+        rng = np.random.default_rng(self.seed)
+        if vectors.shape[0] > self.train_size:
+            vectors = vectors[rng.choice(vectors.shape[0], self.train_size, replace=False)]
+        vectors = np.asarray(vectors, dtype=np.float32)  # after sampling: only the training rows are copied
+
+        codebooks = np.zeros((self.n_subvectors, self.n_centroids, sub_dimension), dtype=np.float32)
+        for j in range(self.n_subvectors):
+            sub = vectors[:, j * sub_dimension:(j + 1) * sub_dimension]
+            centroids = _kmeans(sub, self.n_centroids, self.iterations, rng)
+            codebooks[j, :centroids.shape[0]] = centroids
+            # Pad tiny training sets by repeating centroids so every code decodes
+            if centroids.shape[0] < self.n_centroids:
+                codebooks[j, centroids.shape[0]:] = centroids[0]
+        self.codebooks = codebooks
+        return self
+
+    def _split(self, vectors):
+        n = vectors.shape[0]
+        return vectors.reshape(n, self.n_subvectors, -1)
+
+    def encode(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((vectors.shape[0], self.n_subvectors), dtype=np.uint8)
+        centroid_norms = (self.codebooks ** 2).sum(axis=2)
+        for start in range(0, vectors.shape[0], BLOCK_ROWS):
+            sub = self._split(vectors[start:start + BLOCK_ROWS])
+            for j in range(self.n_subvectors):
+                distances = centroid_norms[j][None, :] - 2.0 * (sub[:, j, :] @ self.codebooks[j].T)
+                codes[start:start + BLOCK_ROWS, j] = distances.argmin(axis=1)
+        return codes
+
+    def decode(self, codes):
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.n_subvectors)]
+        return np.concatenate(parts, axis=1)
+
+    def scores(self, codes, query_vector):
+        """ADC: one lookup table per query, then table gathers per code"""
+        sub_query = query_vector.reshape(self.n_subvectors, -1)
+        table = np.einsum('jd,jkd->jk', sub_query, self.codebooks).ravel()
+        offsets = np.arange(self.n_subvectors, dtype=np.intp) * self.n_centroids
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], BLOCK_ROWS):
+            positions = codes[start:start + BLOCK_ROWS] + offsets
+            scores[start:start + BLOCK_ROWS] = table.take(positions).sum(axis=1)
+        return scores
+
+
+def create_quantizer(method, n_subvectors=None):
+    if method == "int8":
+        return ScalarQuantizer()
+    if method == "pq":
+        return ProductQuantizer(n_subvectors=n_subvectors)
+    raise ValueError(f"Unknown quantization method: {method}")
+
+
+class QuantizedVectorStore(LocalVectorStore):
+    """Vector store that keeps only compact codes in memory.
+
+    Built ``from_store`` on a ``MappedVectorStore``, it reads metadata from
+    the file on demand, and (with ``rescore``) re-ranks the best
+    ``top_k * rescore_factor`` candidates with exact cosine similarity against
+    the file's full vectors, which stay on disk. Rows added or overwritten
+    later keep their own full vector in memory so they re-score correctly.
+    """
+
+    def __init__(self, quantizer, rescore=False, rescore_factor=4, initial_capacity=1024):
+        super().__init__(dimension=None, initial_capacity=initial_capacity)
+        self.quantizer = quantizer
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self._codes = None
+        self._initial_capacity = initial_capacity
+        self._source = None  # MappedVectorStore the rows were quantized from
+        self._source_rows = None  # row -> source row, -1 once added / overwritten here
+        self._own_vectors = {}  # id -> full vector for rows not in the source (re-scoring only)
+
+    @classmethod
+    def from_store(cls, store, method="int8", n_subvectors=None, rescore=True, rescore_factor=4):
+        """Quantize every vector of an existing store.
+
+        Re-scoring needs the full vectors on disk, so it is only available for
+        a ``MappedVectorStore``; an in-memory store is quantized without it
+        (keeping its float matrix around would undo the memory saving).
+        """
+        mapped = isinstance(store, MappedVectorStore)
+        if rescore and not mapped:
+            raise ValueError("Re-scoring needs a memory-mapped vector file; quantize a MappedVectorStore or pass rescore=False")
+        quantized = cls(create_quantizer(method, n_subvectors), rescore=rescore,
+                        rescore_factor=rescore_factor, initial_capacity=max(1, len(store)))
+        if mapped:
+            quantized._quantize_source(store)
+        else:
+            quantized.add(list(store.ids), store.vectors, list(store.metadata))
+        return quantized
+
+    def _quantize_source(self, store):
+        """Encode a mapped file block by block; ids are kept, metadata stays in the file"""
+        count = len(store)
+        self.quantizer.fit(store.vectors)
+        self.dimension = store.dimension
+        self._codes = np.empty((max(self._initial_capacity, count), self.quantizer.code_width(self.dimension)),
+                               dtype=self.quantizer.code_dtype)
+        for start in range(0, count, BLOCK_ROWS):
+            self._codes[start:start + BLOCK_ROWS] = self.quantizer.encode(normalize_rows(store.vectors[start:start + BLOCK_ROWS]))
+        self._source = store
+        self._source_rows = np.full(self._codes.shape[0], -1, dtype=np.int64)
+        self._source_rows[:count] = np.arange(count)
+        self.ids = list(store.ids)
+        self.metadata = [None] * count  # None: read from the source file when matched
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self._size = count
+
+    @property
+    def vectors(self):
+        """Reconstructed (lossy) vectors, decoded on demand"""
+        if self._codes is None:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return self.quantizer.decode(self._codes[:self._size])
+
+    @property
+    def nbytes(self):
+        """Memory held by the codes and by full vectors kept for re-scoring added rows"""
+        codes = 0 if self._codes is None else self._codes[:self._size].nbytes
+        return codes + sum(vector.nbytes for vector in self._own_vectors.values())
+
+    @property
+    def rescore_nbytes(self):
+        """Size of the full vectors re-scoring reads from the mapped file (paged in on demand)"""
+        return self._source.vectors.nbytes if self._rescoring else 0
+
+    @property
+    def _rescoring(self):
+        return self.rescore and self._source is not None and self.rescore_factor > 1
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = self._codes.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        grown = np.empty((new_capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+        grown[:self._size] = self._codes[:self._size]
+        self._codes = grown
+        if self._source_rows is not None:
+            rows = np.full(new_capacity, -1, dtype=np.int64)
+            rows[:self._size] = self._source_rows[:self._size]
+            self._source_rows = rows
+
+    def add(self, ids: List[str], embeddings, metadata: Optional[List[Dict[str, Any]]] = None):
+        """Encode and add vectors; the quantizer is fitted on the first batch"""
+        embeddings = normalize_rows(np.atleast_2d(embeddings))
+        if metadata is None:
+            metadata = [{} for _ in ids]
+        if len(ids) != embeddings.shape[0] or len(ids) != len(metadata):
+            raise ValueError("ids, embeddings and metadata must have the same length")
+
+        if not self.quantizer.is_fitted:
+            self.quantizer.fit(embeddings)
+        if self._codes is None:
+            self.dimension = embeddings.shape[1]
+            width = self.quantizer.code_width(self.dimension)
+            self._codes = np.empty((max(self._initial_capacity, len(ids)), width), dtype=self.quantizer.code_dtype)
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {embeddings.shape[1]}")
+
+        codes = self.quantizer.encode(embeddings)
+        new_rows = {}  # id -> (vector, code, metadata); a repeated id in one batch keeps its last values
+        for vector_id, vector, code, meta in zip(ids, embeddings, codes, metadata):
+            row = self._id_to_row.get(vector_id)
+            if row is not None:
+                self._codes[row] = code
+                self.metadata[row] = meta
+                self._detach(row, vector_id, vector)
+            else:
+                new_rows[vector_id] = (vector, code, meta)
+
+        if new_rows:
+            self._reserve(len(new_rows))
+            for vector_id, (vector, code, meta) in new_rows.items():
+                row = self._size
+                self._codes[row] = code
+                self._id_to_row[vector_id] = row
+                self.ids.append(vector_id)
+                self.metadata.append(meta)
+                self._size += 1
+                self._detach(row, vector_id, vector)
+
+    def _detach(self, row, vector_id, vector):
+        """Row no longer matches the source file: re-score it from its own vector"""
+        if self._source_rows is None:
+            return
+        self._source_rows[row] = -1
+        if self.rescore:
+            self._own_vectors[vector_id] = vector.copy()
+
+    def _compact(self, keep):
+        remaining = int(keep.sum())
+        self._codes[:remaining] = self._codes[:self._size][keep]
+        if self._source_rows is not None:
+            self._source_rows[:remaining] = self._source_rows[:self._size][keep]
+        for vector_id, kept in zip(self.ids, keep):
+            if not kept:
+                self._own_vectors.pop(vector_id, None)
+
+    def row_metadata(self, row):
+        meta = self.metadata[row]
+        if meta is None:
+            meta = self._source.row_metadata(int(self._source_rows[row]))
+        return meta
+
+    def _full_vectors(self, rows):
+        """Exact vectors of ``rows``: from the mapped file, or kept in memory for added rows"""
+        source_rows = self._source_rows[rows]
+        in_file = source_rows >= 0
+        vectors = np.empty((len(rows), self.dimension), dtype=np.float32)
+        vectors[in_file] = self._source.vectors[source_rows[in_file]]
+        for position in np.flatnonzero(~in_file):
+            vectors[position] = self._own_vectors[self.ids[rows[position]]]
+        return vectors
+
+    def _scores(self, query_vector):
+        return self.quantizer.scores(self._codes[:self._size], query_vector)
+
+    def _top_k(self, query_vector, top_k):
+        approximate = self._scores(query_vector)
+        if not self._rescoring:
+            indices = top_k_indices(approximate, top_k)
+            return indices, approximate[indices]
+
+        candidates = top_k_indices(approximate, top_k * self.rescore_factor)
+        candidates.sort()  # sequential reads from the mapped file
+        exact = self._full_vectors(candidates) @ query_vector
+        best = top_k_indices(exact, top_k)
+        return candidates[best], exact[best]
+
+    def _top_k_many(self, query_matrix, top_k):
+        return [self._top_k(query_vector, top_k) for query_vector in query_matrix]
@@ -1,19 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
 import time
-import google.generativeai as genai
-import pinecone
-from pinecone import Pinecone, ServerlessSpec
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain.schema import Document
-from sentence_transformers import SentenceTransformer
-from datasets import load_dataset
+import asyncio
+import contextvars
+import functools
 import json
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from vector_store import LocalVectorStore, VectorSearch
+from hnsw_index import HNSWIndex
+from vector_file import MappedVectorStore, write_vector_file
+from quantization import QuantizedVectorStore
+from lexical_index import BM25Index
+from fusion import reciprocal_rank_fusion, weighted_score_fusion
+from embedding_cache import get_embedding_cache
+from embedding_batcher import get_embedding_batcher, embedding_batcher_stats
+from client_registry import get_client_registry
+from answer_cache import SemanticAnswerCache
+from intent_classifier import LocalIntentClassifier, INTENTS
+from context_packer import ContextPacker
+from metrics import REGISTRY, stage, timed_stage, timed_request, record_llm_call, record_fallback, submit_in_context
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
@@ -21,6 +33,31 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 app = Flask(__name__)
 CORS(app)
 
+# Shared worker pool for retrieval calls that run alongside each other
+retrieval_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
+
+# Separate pool for Self-Ask sub-questions, which themselves submit retrieval work
+subquestion_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SUBQUESTION_WORKERS', '16')),
+    thread_name_prefix="subquestion"
+)
+
+# Bounded pool for /api/chat/batch items, so one bulk job cannot monopolize the server
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_WORKERS', '8')),
+    thread_name_prefix="batch"
+)
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '5000'))
+
+# Count every LLM call (and its estimated tokens) against the bot and stage that made it
+get_client_registry().add_llm_listener(record_llm_call)
+
+def run_in_pool(func, *args, **kwargs):
+    """Await a blocking call (local model, vector index, Pinecone) on the retrieval pool"""
+    loop = asyncio.get_running_loop()
+    # Carry the request's metrics context (bot, stage) over to the pool thread
+    return loop.run_in_executor(retrieval_executor, functools.partial(contextvars.copy_context().run, func, *args, **kwargs))
+
 # Enhanced fallback responses for when API keys are not available
 BUSINESS_FALLBACK_RESPONSES = {
     "services": """**TechFlow Solutions** offers comprehensive technology services:
@@ -122,8 +159,14 @@ HEALTHCARE_FALLBACK_RESPONSES = {
 # Configuration classes from notebooks
 class Config:
     def __init__(self):
+        self.bot_name = "business"  # "bot" label on /api/metrics
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.pinecone_api_key = os.getenv('PINECONE_API_KEY')
+        self.model_backend = os.getenv('MODEL_BACKEND', 'gemini')  # "gemini" or "fake" (offline stand-ins)
+        if self.model_backend == "fake":
+            # The stand-ins need no credentials; placeholder keys enable the Gemini and Pinecone paths
+            self.gemini_api_key = self.gemini_api_key or "fake"
+            self.pinecone_api_key = self.pinecone_api_key or "fake"
         self.embedding_model = "models/embedding-001"
         self.chat_model = "gemini-1.5-flash"
         self.max_tokens = 150
@@ -131,19 +174,61 @@ class Config:
         self.use_sentence_transformers = False
         self.sentence_transformer_model = "all-MiniLM-L6-v2"
         self.index_name = "business-qa-bot-gemini"
+        self.vector_backend = os.getenv('VECTOR_BACKEND', 'pinecone')  # "pinecone", "local" or "hnsw"
+        self.hnsw_m = 16
+        self.hnsw_ef_construction = 200
+        self.hnsw_ef_search = 64  # higher = better recall, slower queries
+        self.hnsw_index_path = os.getenv('BUSINESS_HNSW_INDEX_PATH')
+        self.index_path = os.getenv('BUSINESS_INDEX_PATH')  # memory-mapped vector file for the local backend
+        self.index_dtype = "float32"
+        self.vector_quantization = os.getenv('VECTOR_QUANTIZATION')  # None, "int8" or "pq"
+        self.pq_subvectors = None  # default: dimension // 4 (16x smaller than float32)
+        self.rescore_factor = 4  # exact re-scoring over top_k * factor candidates; 1 disables
         self.dimension = 768 if not self.use_sentence_transformers else 384
         self.metric = "cosine"
         self.chunk_size = 1000
         self.chunk_overlap = 200
+        self.chunk_tokens = 256  # chunk sizes used by ingest.py --tokenizer
+        self.chunk_overlap_tokens = 48
         self.top_k_results = 5
+        self.context_token_budget = int(os.getenv('BUSINESS_CONTEXT_TOKENS', '1000'))  # retrieved context in the answer prompt
+        self.context_truncate_sentences = True  # cut the last document at a sentence instead of dropping it
+        self.intent_confidence_threshold = 0.7  # below this the LLM classifies the intent
+        self.react_stop_score = 0.85  # end the ReACT loop early once a hit is this relevant
+        self.use_answer_cache = True
+        self.answer_cache_threshold = 0.95
+        self.answer_cache_entries = 1000
+        self.answer_cache_ttl = 3600  # seconds
+        self.answer_cache_min_confidence = 0.4  # weaker answers are not reused
+        self.index_check_interval = float(os.getenv('INDEX_CHECK_INTERVAL', '5'))  # seconds between index change checks
+        self.embedding_cache_entries = 10000
+        self.embedding_cache_max_bytes = 64 * 1024 * 1024
+        self.embedding_cache_ttl = 3600  # seconds
+        # Concurrent query embeddings are coalesced into one model call per batch
+        self.embedding_batching = os.getenv('EMBED_BATCHING', 'true').lower() == 'true'
+        self.embedding_batch_max_size = int(os.getenv('EMBED_BATCH_MAX_SIZE', '64'))
+        self.embedding_batch_max_wait_ms = float(os.getenv('EMBED_BATCH_MAX_WAIT_MS', '5'))
+        self.embedding_batch_timeout = float(os.getenv('EMBED_BATCH_TIMEOUT', '30'))  # seconds a query waits for its batch
+        # One encoder thread saturates the CPU for local models; API calls overlap
+        self.embedding_batch_workers = int(os.getenv('EMBED_BATCH_WORKERS', '1' if self.use_sentence_transformers else '4'))
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'dense')  # "dense" or "hybrid"
+        self.fusion_method = "rrf"  # "rrf" (reciprocal rank fusion) or "weighted"
+        self.rrf_k = 60
+        self.dense_weight = 0.6  # lexical weight is 1 - dense_weight
         
         if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
+            get_client_registry().configure_gemini(self.gemini_api_key)
 
 class HealthcareConfig:
     def __init__(self):
+        self.bot_name = "healthcare"
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         self.pinecone_api_key = os.getenv('PINECONE_API_KEY')
+        self.model_backend = os.getenv('MODEL_BACKEND', 'gemini')  # "gemini" or "fake" (offline stand-ins)
+        if self.model_backend == "fake":
+            # The stand-ins need no credentials; placeholder keys enable the Gemini and Pinecone paths
+            self.gemini_api_key = self.gemini_api_key or "fake"
+            self.pinecone_api_key = self.pinecone_api_key or "fake"
         self.embedding_model = "models/embedding-001"
         self.chat_model = "gemini-1.5-flash"
         self.max_tokens = 200
@@ -151,16 +236,51 @@ class HealthcareConfig:
         self.use_sentence_transformers = False
         self.sentence_transformer_model = "all-MiniLM-L6-v2"
         self.index_name = "healthcare-qa-bot"
+        self.vector_backend = os.getenv('VECTOR_BACKEND', 'pinecone')  # "pinecone", "local" or "hnsw"
+        self.hnsw_m = 16
+        self.hnsw_ef_construction = 200
+        self.hnsw_ef_search = 32  # trade a little recall for faster queries on large corpora
+        self.hnsw_index_path = os.getenv('HEALTHCARE_HNSW_INDEX_PATH')
+        self.index_path = os.getenv('HEALTHCARE_INDEX_PATH')  # memory-mapped vector file for the local backend
+        self.index_dtype = "float16"
+        self.vector_quantization = os.getenv('VECTOR_QUANTIZATION')  # None, "int8" or "pq"
+        self.pq_subvectors = None  # default: dimension // 4 (16x smaller than float32)
+        self.rescore_factor = 4  # exact re-scoring over top_k * factor candidates; 1 disables
         self.dimension = 768 if not self.use_sentence_transformers else 384
         self.metric = "cosine"
         self.chunk_size = 800
         self.chunk_overlap = 150
+        self.chunk_tokens = 200  # chunk sizes used by ingest.py --tokenizer
+        self.chunk_overlap_tokens = 40
         self.top_k_results = 7
+        self.context_token_budget = int(os.getenv('HEALTHCARE_CONTEXT_TOKENS', '600'))  # per sub-question answer prompt
+        self.context_truncate_sentences = True
+        self.intent_confidence_threshold = 0.7  # below this the LLM classifies the intent
+        self.use_answer_cache = True
+        self.answer_cache_threshold = 0.97  # medical paraphrases must match closely
+        self.answer_cache_entries = 1000
+        self.answer_cache_ttl = 3600  # seconds
+        self.answer_cache_min_confidence = 0.4  # weaker answers are not reused
+        self.index_check_interval = float(os.getenv('INDEX_CHECK_INTERVAL', '5'))  # seconds between index change checks
+        self.embedding_cache_entries = 10000
+        self.embedding_cache_max_bytes = 64 * 1024 * 1024
+        self.embedding_cache_ttl = 3600  # seconds
+        # Concurrent query embeddings are coalesced into one model call per batch
+        self.embedding_batching = os.getenv('EMBED_BATCHING', 'true').lower() == 'true'
+        self.embedding_batch_max_size = int(os.getenv('EMBED_BATCH_MAX_SIZE', '64'))
+        self.embedding_batch_max_wait_ms = float(os.getenv('EMBED_BATCH_MAX_WAIT_MS', '5'))
+        self.embedding_batch_timeout = float(os.getenv('EMBED_BATCH_TIMEOUT', '30'))  # seconds a query waits for its batch
+        # One encoder thread saturates the CPU for local models; API calls overlap
+        self.embedding_batch_workers = int(os.getenv('EMBED_BATCH_WORKERS', '1' if self.use_sentence_transformers else '4'))
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'dense')  # "dense" or "hybrid"
+        self.fusion_method = "rrf"  # "rrf" (reciprocal rank fusion) or "weighted"
+        self.rrf_k = 60
+        self.dense_weight = 0.6  # lexical weight is 1 - dense_weight
         self.max_iterations = 3
         self.confidence_threshold = 0.7
         
         if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
+            get_client_registry().configure_gemini(self.gemini_api_key)
 
 # Sample knowledge data - in production, this would be loaded from a proper knowledge base
 SAMPLE_BUSINESS_KNOWLEDGE = [
@@ -307,11 +427,49 @@ def get_fallback_response(message: str, bot_type: str) -> str:
     return "I'm here to help! Please ask me a question."
 
 # Enhanced EmbeddingManager with fallback knowledge
+def emit(on_event, event_type, **fields):
+    """Send a progress event to a streaming listener, if there is one"""
+    if on_event:
+        on_event({"type": event_type, **fields})
+
+def generate_text(llm, prompt, on_event=None):
+    """Invoke the chat model; with a listener, stream tokens as they arrive"""
+    if not on_event:
+        response = llm.invoke(prompt)
+        return response.content if hasattr(response, 'content') else str(response)
+    
+    parts = []
+    for chunk in llm.stream(prompt):
+        text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+        if text:
+            parts.append(text)
+            emit(on_event, "token", text=text)
+    return "".join(parts)
+
+def create_chat_model(config):
+    """Shared Gemini chat model for a config, or None without an API key"""
+    if not config.gemini_api_key:
+        return None
+    return get_client_registry().chat_model(
+        config.chat_model, config.gemini_api_key, config.temperature, config.max_tokens
+    )
+
+async def agenerate_text(llm, prompt):
+    """Await the chat model without holding a thread"""
+    response = await llm.ainvoke(prompt)
+    return response.content if hasattr(response, 'content') else str(response)
+
+# A replaced vector file stays mapped this long, so queries that already picked it up can finish
+RETIRED_INDEX_GRACE_SECONDS = 60
+
 class EmbeddingManager:
-    def __init__(self, config):
+    def __init__(self, config, index_path=None):
         self.config = config
-        self.pc = Pinecone(api_key=config.pinecone_api_key) if config.pinecone_api_key else None
+        self.pc = None
         self.index = None
+        self.index_path = index_path or getattr(config, 'index_path', None)
+        self.retrieval_mode = config.retrieval_mode
+        self._index_from_knowledge_base = False
         
         # Load appropriate knowledge base
         if hasattr(config, 'max_iterations'):  # Healthcare config
@@ -319,19 +477,190 @@ class EmbeddingManager:
         else:  # Business config
             self.knowledge_base = SAMPLE_BUSINESS_KNOWLEDGE
         
-        if self.pc:
+        # Query embeddings are cached process-wide, keyed by model + normalized text
+        self.embedding_cache = get_embedding_cache(
+            max_entries=config.embedding_cache_entries,
+            max_bytes=config.embedding_cache_max_bytes,
+            ttl_seconds=config.embedding_cache_ttl
+        )
+        
+        # Semantic cache of final answers, invalidated whenever index_version changes
+        self.index_version = 0
+        self._index_lock = threading.Lock()
+        self.answer_cache = SemanticAnswerCache(
+            threshold=config.answer_cache_threshold,
+            max_entries=config.answer_cache_entries,
+            ttl_seconds=config.answer_cache_ttl
+        ) if config.use_answer_cache else None
+        
+        # Embedding models are loaded once per process and shared between bots
+        if config.use_sentence_transformers:
+            self.embedding_model = get_client_registry().sentence_transformer(config.sentence_transformer_model)
+        elif config.gemini_api_key:
+            self.embedding_model = get_client_registry().gemini_embeddings(config.embedding_model, config.gemini_api_key)
+        else:
+            self.embedding_model = None
+        
+        self.query_batcher = None
+        if self.embedding_model and config.embedding_batching:
+            self.query_batcher = get_embedding_batcher(
+                self._embedding_model_name(),
+                self.generate_embeddings,
+                max_batch_size=config.embedding_batch_max_size,
+                max_wait_ms=config.embedding_batch_max_wait_ms,
+                workers=config.embedding_batch_workers,
+                timeout=config.embedding_batch_timeout
+            )
+        
+        if self.index_path and os.path.exists(self.index_path):
+            self.index = self._open_vector_file(self.index_path)
+        elif config.vector_backend == "hnsw" and config.hnsw_index_path and os.path.exists(config.hnsw_index_path):
+            self.index = HNSWIndex.load(config.hnsw_index_path, ef_search=config.hnsw_ef_search)
+            print(f"✅ Loaded HNSW index with {len(self.index)} documents")
+        elif config.vector_backend in ("local", "hnsw"):
+            self.index = self._build_local_index()
+        elif config.pinecone_api_key:
             try:
-                self.index = self.pc.Index(config.index_name)
+                self.pc = get_client_registry().pinecone_client(config.pinecone_api_key)
+                self.index = get_client_registry().pinecone_index(config.pinecone_api_key, config.index_name)
+                if config.model_backend == "fake":
+                    # The stand-in index lives in this process, so it only ever holds the seeded knowledge base
+                    if not self.index.describe_index_stats()['total_vector_count']:
+                        self._seed_index(self.index)
+                    self._index_from_knowledge_base = True
             except:
                 print(f"Could not connect to index: {config.index_name}")
         
-        if config.use_sentence_transformers:
-            self.embedding_model = SentenceTransformer(config.sentence_transformer_model)
-        else:
-            self.embedding_model = GoogleGenerativeAIEmbeddings(
-                model=config.embedding_model,
-                google_api_key=config.gemini_api_key
-            ) if config.gemini_api_key else None
+        if config.vector_quantization and self.index is not None and config.vector_backend != "pinecone":
+            self.index = self._quantize_index(self.index)
+        
+        # Lexical index for hybrid retrieval (or just the fallback path), built once per loaded index
+        self._lexical = self._build_lexical_index(self.index)
+        
+        # ingest.py updates the index from another process, so changes are detected by polling
+        self._index_fingerprint = self._read_index_fingerprint()
+        self._index_checked_at = time.monotonic()
+        self._retired_indexes = []  # (replaced at, index) kept open for queries still using them
+    
+    def _build_lexical_index(self, index):
+        """(BM25 index, row source) for ``index``.
+        
+        In hybrid mode BM25 covers the same documents the index holds, so fusion
+        ranks one corpus. Otherwise it only backs the fallback path and covers
+        the small built-in knowledge base, so a large mapped file is never read
+        in full at startup.
+        """
+        if self.retrieval_mode == "hybrid" and isinstance(index, VectorSearch) and len(index):
+            # Rows of the in-process index (a mapped file may hold a much larger ingested corpus)
+            return BM25Index((index.row_metadata(row) for row in range(len(index))), text_key='text'), index
+        
+        if index is not None and not self._index_from_knowledge_base and self.retrieval_mode == "hybrid":
+            # A remote Pinecone index is filled by ingest.py, and its documents can't be listed here
+            print(f"⚠️  Hybrid retrieval needs the documents of {self.config.index_name} for BM25, using dense retrieval only")
+            self.retrieval_mode = "dense"
+        return BM25Index(self.knowledge_base), None
+    
+    def _lexical_document(self, source, doc_index):
+        if source is None:
+            doc = self.knowledge_base[doc_index]
+            return {'id': f"{doc['source']}_{doc_index}", 'text': doc['content'], 'source': doc['source']}
+        metadata = source.row_metadata(doc_index)
+        return {
+            'id': source.ids[doc_index],
+            'text': metadata.get('text', ''),
+            'source': metadata.get('source', 'unknown')
+        }
+    
+    def _quantize_index(self, store):
+        """Replace float vectors with int8 / PQ codes, re-scoring from the mapped vector file if there is one"""
+        if isinstance(store, HNSWIndex):
+            print("⚠️  Quantization is not supported for the HNSW backend, keeping float32 vectors")
+            return store
+        
+        # Re-scoring reads the full vectors from disk; an in-memory float matrix would cancel the saving
+        rescore = self.config.rescore_factor > 1 and isinstance(store, MappedVectorStore)
+        if self.config.rescore_factor > 1 and not rescore:
+            print("⚠️  Re-scoring needs a memory-mapped vector file (BUSINESS_INDEX_PATH / HEALTHCARE_INDEX_PATH), using codes only")
+        
+        try:
+            quantized = QuantizedVectorStore.from_store(
+                store,
+                method=self.config.vector_quantization,
+                n_subvectors=self.config.pq_subvectors,
+                rescore=rescore,
+                rescore_factor=self.config.rescore_factor
+            )
+            print(f"✅ Quantized vectors with {self.config.vector_quantization}: {quantized.nbytes} bytes in memory")
+            return quantized
+        except Exception as e:
+            print(f"Could not quantize vector index: {e}")
+            return store
+    
+    def _embedding_model_name(self):
+        if self.config.use_sentence_transformers:
+            return self.config.sentence_transformer_model
+        return self.config.embedding_model
+    
+    def _open_vector_file(self, path):
+        """Memory-map a prebuilt vector file instead of embedding anything"""
+        store = MappedVectorStore(path)
+        model_name = store.manifest.get('embedding_model')
+        if model_name and model_name != self._embedding_model_name():
+            print(f"⚠️  {path} was built with {model_name}, but {self._embedding_model_name()} is configured")
+        print(f"✅ Mapped vector file {path} with {len(store)} documents")
+        return store
+    
+    def _create_vector_store(self):
+        """Create an empty in-process index for the configured backend"""
+        if self.config.vector_backend == "hnsw":
+            return HNSWIndex(
+                M=self.config.hnsw_m,
+                ef_construction=self.config.hnsw_ef_construction,
+                ef_search=self.config.hnsw_ef_search
+            )
+        return LocalVectorStore()
+    
+    def _build_local_index(self):
+        """Embed the knowledge base into an in-process vector store"""
+        if not self.embedding_model:
+            print("⚠️  Local vector backend needs an embedding model, using text search only")
+            return None
+        
+        try:
+            texts = [doc['content'] for doc in self.knowledge_base]
+            embeddings = self.generate_embeddings(texts)
+            store = self._create_vector_store()
+            store.add(
+                ids=[f"{doc['source']}_{i}" for i, doc in enumerate(self.knowledge_base)],
+                embeddings=embeddings,
+                metadata=[{'text': doc['content'], 'source': doc['source']} for doc in self.knowledge_base]
+            )
+            print(f"✅ Local vector index ready with {len(store)} documents")
+            
+            if isinstance(store, HNSWIndex):
+                if self.config.hnsw_index_path:
+                    store.save(self.config.hnsw_index_path)
+            elif self.index_path:
+                # Persist once so later restarts and other workers just map the file
+                write_vector_file(self.index_path, store, dtype=self.config.index_dtype, manifest={
+                    'embedding_model': self._embedding_model_name(),
+                    'index_name': self.config.index_name
+                })
+                return self._open_vector_file(self.index_path)
+            return store
+        except Exception as e:
+            print(f"Could not build local vector index: {e}")
+            return None
+    
+    def _seed_index(self, index):
+        """Load the knowledge base into an empty stand-in Pinecone index, as ingest.py would"""
+        texts = [doc['content'] for doc in self.knowledge_base]
+        index.upsert(vectors=[
+            (f"{doc['source']}_{i}", embedding, {'text': doc['content'], 'source': doc['source']})
+            for i, (doc, embedding) in enumerate(zip(self.knowledge_base, self.generate_embeddings(texts)))
+        ])
+        print(f"✅ Seeded stand-in index {self.config.index_name} with "
+              f"{index.describe_index_stats()['total_vector_count']} documents")
     
     def generate_embeddings(self, texts):
         if self.config.use_sentence_transformers:
@@ -340,56 +669,316 @@ class EmbeddingManager:
             return self.embedding_model.embed_documents(texts)
         return []
     
+    async def agenerate_embeddings(self, texts):
+        """Async generate_embeddings; local models run on the retrieval pool"""
+        if self.config.use_sentence_transformers:
+            return await run_in_pool(self.generate_embeddings, texts)
+        elif self.embedding_model:
+            return await self.embedding_model.aembed_documents(texts)
+        return []
+    
+    def mark_index_changed(self):
+        """Call after adding or removing documents so cached answers are dropped"""
+        self.index_version += 1
+    
+    def _read_index_fingerprint(self):
+        """Something that changes when another process rewrites the index, or None if nothing can"""
+        try:
+            if isinstance(self.index, MappedVectorStore) or (
+                    isinstance(self.index, QuantizedVectorStore) and self.index_path):
+                # write_vector_file renames a new file into place
+                stat = os.stat(self.index_path)
+                return stat.st_mtime_ns, stat.st_size, stat.st_ino
+            if self.index is not None and not isinstance(self.index, VectorSearch):
+                # Upserts that only overwrite existing ids don't show here; deletes and new chunks do
+                return self.index.describe_index_stats()['total_vector_count']
+        except Exception as e:
+            print(f"Could not check index for changes: {e}")
+        return None
+    
+    def _index_check_due(self):
+        return (self._index_fingerprint is not None
+                and time.monotonic() - self._index_checked_at >= self.config.index_check_interval)
+    
+    def refresh_index(self):
+        """Pick up changes ingest.py made to the index: re-map a rewritten vector file and drop cached answers"""
+        with self._index_lock:
+            if not self._index_check_due():
+                return
+            self._index_checked_at = time.monotonic()
+            self._close_retired_indexes()
+            fingerprint = self._read_index_fingerprint()
+            if fingerprint is None or fingerprint == self._index_fingerprint:
+                return
+            
+            if isinstance(self.index, (MappedVectorStore, QuantizedVectorStore)):
+                try:
+                    index = self._open_vector_file(self.index_path)
+                    if self.config.vector_quantization:
+                        index = self._quantize_index(index)
+                    self._lexical = self._build_lexical_index(index)
+                    previous, self.index = self.index, index
+                except Exception as e:
+                    print(f"Could not reload vector file {self.index_path}: {e}")
+                    return
+                self._retired_indexes.append((time.monotonic(), previous))
+            print(f"🔄 {self.config.index_name} changed, dropping cached answers")
+            self._index_fingerprint = fingerprint
+            self.mark_index_changed()
+    
+    def _close_retired_indexes(self):
+        """Unmap vector files replaced more than RETIRED_INDEX_GRACE_SECONDS ago"""
+        still_open = []
+        for retired_at, index in self._retired_indexes:
+            if time.monotonic() - retired_at < RETIRED_INDEX_GRACE_SECONDS:
+                still_open.append((retired_at, index))
+                continue
+            if isinstance(index, QuantizedVectorStore):
+                index = index._source  # re-scores from the mapped file, if any
+            try:
+                if isinstance(index, MappedVectorStore):
+                    index.close()
+            except BufferError:  # a query still holds a view of the mapping
+                still_open.append((retired_at, index))
+        self._retired_indexes = still_open
+    
+    @timed_stage("answer_cache")
+    def get_cached_answer(self, question):
+        """(previously generated answer for a near-duplicate question or None, index version looked up).
+        
+        Pass the version on to ``cache_answer`` so an answer built while the
+        index changed is not cached under the new version.
+        """
+        if not self.answer_cache or not self.embedding_model:
+            return None, self.index_version
+        index_version = self.index_version
+        try:
+            if self._index_check_due():
+                self.refresh_index()
+            index_version = self.index_version
+            return self.answer_cache.lookup(self.embed_query(question), index_version), index_version
+        except Exception as e:
+            print(f"Answer cache lookup error: {e}")
+            return None, index_version
+    
+    @timed_stage("answer_cache")
+    async def aget_cached_answer(self, question):
+        if not self.answer_cache or not self.embedding_model:
+            return None, self.index_version
+        index_version = self.index_version
+        try:
+            if self._index_check_due():
+                await run_in_pool(self.refresh_index)
+            index_version = self.index_version
+            return self.answer_cache.lookup(await self.aembed_query(question), index_version), index_version
+        except Exception as e:
+            print(f"Answer cache lookup error: {e}")
+            return None, index_version
+    
+    def _cacheable(self, result):
+        return (self.answer_cache and self.embedding_model and not result.get("error")
+                and result.get("confidence", 0) >= self.config.answer_cache_min_confidence)
+    
+    def cache_answer(self, question, result, index_version):
+        """Cache ``result`` under the index version its question was looked up with"""
+        if not self._cacheable(result):
+            return
+        try:
+            self.answer_cache.store(self.embed_query(question), result, index_version)
+        except Exception as e:
+            print(f"Answer cache store error: {e}")
+    
+    async def acache_answer(self, question, result, index_version):
+        if not self._cacheable(result):
+            return
+        try:
+            self.answer_cache.store(await self.aembed_query(question), result, index_version)
+        except Exception as e:
+            print(f"Answer cache store error: {e}")
+    
+    def embed_query(self, query):
+        """Embedding for a single query, served from the shared cache when possible"""
+        return self.embed_queries([query])[0]
+    
+    async def aembed_query(self, query):
+        return (await self.aembed_queries([query]))[0]
+    
+    @timed_stage("embedding")
+    def _embed_missing(self, queries):
+        """Embed cache misses, through the shared micro-batcher when enabled"""
+        if self.query_batcher:
+            return self.query_batcher.embed(queries)
+        return self.generate_embeddings(queries)
+    
+    @timed_stage("embedding")
+    async def _aembed_missing(self, queries):
+        if self.query_batcher:
+            return await self.query_batcher.aembed(queries)
+        return await self.agenerate_embeddings(queries)
+    
+    def _cached_embeddings(self, queries):
+        """Cached embeddings (None for misses) plus the distinct queries still to embed"""
+        model_name = self._embedding_model_name()
+        embeddings = [self.embedding_cache.get(model_name, query) for query in queries]
+        missing = list(dict.fromkeys(query for query, embedding in zip(queries, embeddings) if embedding is None))
+        return embeddings, missing
+    
+    def _merge_embeddings(self, queries, embeddings, missing, fresh_embeddings):
+        """Cache freshly computed embeddings and fill them into the result list"""
+        model_name = self._embedding_model_name()
+        fresh = dict(zip(missing, fresh_embeddings))
+        for query, embedding in fresh.items():
+            self.embedding_cache.put(model_name, query, embedding)
+        return [fresh[query] if embedding is None else embedding
+                for query, embedding in zip(queries, embeddings)]
+    
+    def embed_queries(self, queries):
+        """Embeddings for several queries: cache hits plus one batched call for the misses"""
+        embeddings, missing = self._cached_embeddings(queries)
+        if missing:
+            embeddings = self._merge_embeddings(queries, embeddings, missing, self._embed_missing(missing))
+        return embeddings
+    
+    async def aembed_queries(self, queries):
+        embeddings, missing = self._cached_embeddings(queries)
+        if missing:
+            embeddings = self._merge_embeddings(queries, embeddings, missing, await self._aembed_missing(missing))
+        return embeddings
+    
     def search_similar(self, query, top_k=None):
+        return self.search_similar_many([query], top_k)[0]
+    
+    async def asearch_similar(self, query, top_k=None):
+        return (await self.asearch_similar_many([query], top_k))[0]
+    
+    @timed_stage("retrieval")
+    def search_similar_many(self, queries, top_k=None):
+        """Retrieve for several queries with one embedding call and one batched index lookup"""
         if top_k is None:
             top_k = self.config.top_k_results
+        if not queries:
+            return []
         
-        # Try Pinecone first
-        if self.index and self.embedding_model:
-            try:
-                query_embedding = self.generate_embeddings([query])[0]
-                results = self.index.query(
-                    vector=query_embedding,
-                    top_k=top_k,
-                    include_metadata=True
-                )
-                
-                documents = []
-                for match in results['matches']:
-                    documents.append({
-                        'text': match['metadata'].get('text', ''),
-                        'source': match['metadata'].get('source', 'unknown'),
-                        'score': match['score']
-                    })
-                
-                if documents:
-                    return documents
-            except Exception as e:
-                print(f"Pinecone search error: {e}")
+        if self.retrieval_mode == "hybrid":
+            return self._hybrid_search_many(queries, top_k)
+        
+        # Try the vector index first (Pinecone or local), then lexical search per query
+        dense_results = self._dense_search_many(queries, top_k)
+        return [self._or_lexical(query, documents, top_k) for query, documents in zip(queries, dense_results)]
+    
+    @timed_stage("retrieval")
+    async def asearch_similar_many(self, queries, top_k=None):
+        """Async search_similar_many: awaits the embedding call and runs index work on the pool"""
+        if top_k is None:
+            top_k = self.config.top_k_results
+        if not queries:
+            return []
+        
+        if self.retrieval_mode == "hybrid":
+            candidates = top_k * 2
+            dense_results, lexical_results = await asyncio.gather(
+                self._adense_search_many(queries, candidates),
+                run_in_pool(lambda: [self._fallback_search(query, candidates) for query in queries])
+            )
+            return self._fuse_many(dense_results, lexical_results, top_k)
+        
+        dense_results = await self._adense_search_many(queries, top_k)
+        return [self._or_lexical(query, documents, top_k) for query, documents in zip(queries, dense_results)]
+    
+    def _dense_search_many(self, queries, top_k):
+        """Embedding search against the vector index; empty lists if unavailable"""
+        if not (self.index and self.embedding_model):
+            return [[] for _ in queries]
+        
+        try:
+            query_embeddings = self.embed_queries(queries)
+            with stage(self.config.bot_name, "index_query"):
+                if hasattr(self.index, 'query_many'):
+                    responses = self.index.query_many(query_embeddings, top_k=top_k, include_metadata=True)
+                elif len(query_embeddings) == 1:
+                    responses = [self.index.query(vector=query_embeddings[0], top_k=top_k, include_metadata=True)]
+                else:
+                    # Pinecone has no multi-query call, so issue the requests concurrently
+                    futures = [
+                        retrieval_executor.submit(self.index.query, vector=embedding, top_k=top_k, include_metadata=True)
+                        for embedding in query_embeddings
+                    ]
+                    responses = [future.result() for future in futures]
+            return self._documents_from_responses(responses)
+        except Exception as e:
+            print(f"Vector search error: {e}")
+            return [[] for _ in queries]
+    
+    async def _adense_search_many(self, queries, top_k):
+        if not (self.index and self.embedding_model):
+            return [[] for _ in queries]
         
-        # Fallback to simple text matching with sample knowledge
+        try:
+            query_embeddings = await self.aembed_queries(queries)
+            with stage(self.config.bot_name, "index_query"):
+                if hasattr(self.index, 'query_many'):
+                    responses = await run_in_pool(self.index.query_many, query_embeddings, top_k=top_k, include_metadata=True)
+                else:
+                    responses = await asyncio.gather(*[
+                        run_in_pool(self.index.query, vector=embedding, top_k=top_k, include_metadata=True)
+                        for embedding in query_embeddings
+                    ])
+            return self._documents_from_responses(responses)
+        except Exception as e:
+            print(f"Vector search error: {e}")
+            return [[] for _ in queries]
+    
+    def _documents_from_responses(self, responses):
+        """Flatten Pinecone-shaped query responses into result dicts"""
+        all_documents = []
+        for results in responses:
+            documents = []
+            for match in results['matches']:
+                documents.append({
+                    'id': match.get('id'),
+                    'text': match['metadata'].get('text', ''),
+                    'source': match['metadata'].get('source', 'unknown'),
+                    'score': match['score']
+                })
+            all_documents.append(documents)
+        return all_documents
+    
+    def _hybrid_search_many(self, queries, top_k):
+        """Run dense and BM25 retrieval concurrently and fuse the rankings per query"""
+        candidates = top_k * 2
+        # Lexical work goes to the pool; dense stays on this thread because it may fan out to the pool itself
+        lexical_future = submit_in_context(
+            retrieval_executor, lambda: [self._fallback_search(query, candidates) for query in queries]
+        )
+        dense_results = self._dense_search_many(queries, candidates)
+        lexical_results = lexical_future.result()
+        return self._fuse_many(dense_results, lexical_results, top_k)
+    
+    def _fuse_many(self, dense_results, lexical_results, top_k):
+        weights = [self.config.dense_weight, 1.0 - self.config.dense_weight]
+        fused = []
+        for dense, lexical in zip(dense_results, lexical_results):
+            if self.config.fusion_method == "weighted":
+                fused.append(weighted_score_fusion([dense, lexical], weights=weights, top_k=top_k))
+            else:
+                fused.append(reciprocal_rank_fusion([dense, lexical], k=self.config.rrf_k, weights=weights, top_k=top_k))
+        return fused
+    
+    def _or_lexical(self, query, documents, top_k):
+        """Dense results, or BM25 results when the vector index found nothing"""
+        if documents:
+            return documents
+        record_fallback(self.config.bot_name, "lexical_search")
         return self._fallback_search(query, top_k)
     
+    @timed_stage("lexical_search")
     def _fallback_search(self, query, top_k):
-        """Simple text-based search in sample knowledge base"""
-        query_words = set(query.lower().split())
-        
-        scored_docs = []
-        for doc in self.knowledge_base:
-            content_words = set(doc['content'].lower().split())
-            # Simple word overlap scoring
-            overlap = len(query_words.intersection(content_words))
-            if overlap > 0:
-                score = overlap / len(query_words)
-                scored_docs.append({
-                    'text': doc['content'],
-                    'source': doc['source'],
-                    'score': score
-                })
-        
-        # Sort by score and return top results
-        scored_docs.sort(key=lambda x: x['score'], reverse=True)
-        return scored_docs[:top_k]
+        """BM25 search over the precomputed lexical index"""
+        lexical_index, source = self._lexical
+        return [
+            dict(self._lexical_document(source, doc_index), score=score)
+            for doc_index, score in lexical_index.search(query, top_k)
+        ]
 
 class ReACTAgent:
     """ReACT (Reasoning, Acting, Observing) Agent for Business QA"""
@@ -397,23 +986,12 @@ class ReACTAgent:
         self.config = config
         self.embedding_manager = embedding_manager
         self.max_steps = 3
+        self.max_action_top_k = 5  # largest top_k _action_top_k() ever returns
         
-        if config.gemini_api_key:
-            self.llm = ChatGoogleGenerativeAI(
-                model=config.chat_model,
-                google_api_key=config.gemini_api_key,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens
-            )
-        else:
-            self.llm = None
+        self.llm = create_chat_model(config)
     
-    def reason(self, query, context, step_num):
-        """Generate reasoning/thought for current step"""
-        if not self.llm:
-            return f"Analyzing query: {query[:100]}..."
-        
-        reasoning_prompt = f"""
+    def _reasoning_prompt(self, query, context, step_num):
+        return f"""
         You are analyzing a business query. Consider what information is needed to answer it well.
         
         Query: {query}
@@ -423,24 +1001,35 @@ class ReACTAgent:
         What should we think about or search for next? Be specific and actionable.
         Respond with just your reasoning (1-2 sentences).
         """
+    
+    @timed_stage("reason")
+    def reason(self, query, context, step_num):
+        """Generate reasoning/thought for current step"""
+        if not self.llm:
+            return f"Analyzing query: {query[:100]}..."
         
         try:
-            response = self.llm.invoke(reasoning_prompt)
+            response = self.llm.invoke(self._reasoning_prompt(query, context, step_num))
             return response.content[:200] if hasattr(response, 'content') else "Analyzing query requirements..."
         except:
             return f"Step {step_num}: Searching for relevant business information..."
     
-    def act(self, thought, query, existing_context):
-        """Take action based on reasoning - search for information"""
-        # Extract search terms from thought and query
-        search_query = query
-        if "search" in thought.lower() or "find" in thought.lower():
-            # Use original query for search
-            search_results = self.embedding_manager.search_similar(search_query, top_k=3)
-        else:
-            search_results = self.embedding_manager.search_similar(query, top_k=5)
+    @timed_stage("reason")
+    async def areason(self, query, context, step_num):
+        if not self.llm:
+            return f"Analyzing query: {query[:100]}..."
         
-        return search_results
+        try:
+            response = await self.llm.ainvoke(self._reasoning_prompt(query, context, step_num))
+            return response.content[:200] if hasattr(response, 'content') else "Analyzing query requirements..."
+        except:
+            return f"Step {step_num}: Searching for relevant business information..."
+    
+    def _action_top_k(self, thought):
+        # Use original query for search; narrower when the thought asks for something specific
+        if "search" in thought.lower() or "find" in thought.lower():
+            return 3
+        return 5
     
     def observe(self, action_results):
         """Observe results of action"""
@@ -454,156 +1043,353 @@ class ReACTAgent:
         
         return observation
     
-    def process_query(self, query):
-        """Main ReACT process"""
+    def _steps(self, query, on_event=None):
+        """The ReACT loop, shared by process_query and aprocess_query.
+        
+        A generator that yields ("reason", context, step) and ("search", query, top_k)
+        requests, is sent their results, and returns (context, conversation_log);
+        _run blocks on each request and _arun awaits it.
+        """
         context = []
         conversation_log = []
+        memo = {}  # search query -> (top_k, results), lives for this request only
+        seen_ids = set()
         
         for step in range(1, self.max_steps + 1):
+            # Nothing left to discover: every search the act step can issue is already memoized
+            cached = memo.get(query)
+            if cached and cached[0] >= self.max_action_top_k:
+                break
+            
             # Reason
-            thought = self.reason(query, context, step)
+            thought = yield ("reason", context, step)
             conversation_log.append(f"Think {step}: {thought}")
+            emit(on_event, "step", stage="think", step=step, content=thought)
             
             # Act
-            action_results = self.act(thought, query, context)
+            action_results = yield from self._act_step(thought, query, memo)
             conversation_log.append(f"Act {step}: Searched knowledge base")
+            emit(on_event, "step", stage="act", step=step, content="Searched knowledge base")
             
             # Observe
             observation = self.observe(action_results)
             conversation_log.append(f"Observe {step}: {observation}")
+            emit(on_event, "step", stage="observe", step=step, content=observation)
             
-            # Add new results to context
-            context.extend(action_results)
-            
-            # Stop if we have enough context or no new results
-            if len(context) >= 5 or not action_results:
+            if self._merge_results(action_results, context, seen_ids):
                 break
         
         return context, conversation_log
+    
+    def _act_step(self, thought, query, memo):
+        """Act as a step generator: search once per query within a request; a smaller top_k reuses larger results"""
+        top_k = self._action_top_k(thought)
+        cached = memo.get(query) if memo is not None else None
+        if cached is None or cached[0] < top_k:
+            cached = (top_k, (yield ("search", query, top_k)))
+            if memo is not None:
+                memo[query] = cached
+        return cached[1][:top_k]
+    
+    def _run(self, steps, query):
+        """Drive a step generator with blocking calls"""
+        try:
+            request = next(steps)
+            while True:
+                if request[0] == "reason":
+                    result = self.reason(query, request[1], request[2])
+                else:
+                    result = self.embedding_manager.search_similar(request[1], top_k=request[2])
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+    
+    async def _arun(self, steps, query):
+        """Drive a step generator with awaited calls"""
+        try:
+            request = next(steps)
+            while True:
+                if request[0] == "reason":
+                    result = await self.areason(query, request[1], request[2])
+                else:
+                    result = await self.embedding_manager.asearch_similar(request[1], top_k=request[2])
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+    
+    def act(self, thought, query, existing_context, memo=None):
+        """Take action based on reasoning - search for information"""
+        return self._run(self._act_step(thought, query, memo), query)
+    
+    async def aact(self, thought, query, existing_context, memo=None):
+        return await self._arun(self._act_step(thought, query, memo), query)
+    
+    def process_query(self, query, on_event=None):
+        """Main ReACT process; ``on_event`` receives think/act/observe steps as they happen"""
+        return self._run(self._steps(query, on_event), query)
+    
+    async def aprocess_query(self, query, on_event=None):
+        """ReACT process with awaited LLM and retrieval calls"""
+        return await self._arun(self._steps(query, on_event), query)
+    
+    def _merge_results(self, action_results, context, seen_ids):
+        """Add only documents not already in context; return True when the loop should stop"""
+        new_results = []
+        for doc in action_results:
+            doc_key = doc.get('id') or doc.get('text', '')
+            if doc_key not in seen_ids:
+                seen_ids.add(doc_key)
+                new_results.append(doc)
+        context.extend(new_results)
+        
+        # Stop if we have enough context, the step added nothing, or the best hit is already strong
+        top_score = max((doc.get('score', 0) for doc in action_results), default=0)
+        return len(context) >= 5 or not new_results or top_score >= self.config.react_stop_score
+
+def request_outcome(result):
+    """Outcome label of a bot result for the request metrics"""
+    if result.get("error"):
+        return "error"
+    if result.get("cached"):
+        return "cached"
+    if result.get("type", "").endswith("_conversational"):
+        return "greeting"
+    if result.get("mode") == "fallback":
+        return "fallback"
+    return "answer"
 
 class BusinessBot:
     def __init__(self):
         self.config = Config()
         self.embedding_manager = EmbeddingManager(self.config)
         self.react_agent = ReACTAgent(self.config, self.embedding_manager)
-        self.greeting_handler = GreetingHandler(self.config)
-        
-        if self.config.gemini_api_key:
-            self.chat_model = ChatGoogleGenerativeAI(
-                model=self.config.chat_model,
-                google_api_key=self.config.gemini_api_key,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens
-            )
-        else:
-            self.chat_model = None
+        self.greeting_handler = GreetingHandler(self.config, self.embedding_manager)
+        self.context_packer = ContextPacker(
+            self.config.context_token_budget,
+            format_document=self._format_context_document,
+            separator="\n\n---\n\n",
+            truncate=self.config.context_truncate_sentences,
+            bot=self.config.bot_name
+        )
+        
+        self.chat_model = create_chat_model(self.config)
     
-    def ask(self, question):
+    @timed_request(request_outcome)
+    def ask(self, question, on_event=None):
+        """Answer a business question; ``on_event`` receives agent steps and answer tokens"""
         try:
             question = question.strip()
             
+            # Serve paraphrases of already-answered questions from the semantic cache
+            cached, index_version = self.embedding_manager.get_cached_answer(question)
+            if cached:
+                cached["cached"] = True
+                return cached
+            
             # Handle greetings and conversational inputs
-            if self.greeting_handler.is_conversational(question):
-                greeting_response = self.greeting_handler.generate_business_greeting_response(question)
-                if greeting_response:
-                    return {
-                        "response": greeting_response,
-                        "type": "business_conversational",
-                        "confidence": 0.9
-                    }
+            intent = self.greeting_handler.detect_intent(question)
+            greeting = self._greeting_result(question, intent)
+            if greeting:
+                return greeting
             
             # Use ReACT agent for business queries
-            context, reasoning_log = self.react_agent.process_query(question)
+            context, reasoning_log = self.react_agent.process_query(question, on_event)
             
             # Generate final response
             if not self.chat_model:
                 # Use fallback response when API keys are not available
+                record_fallback(self.config.bot_name, "canned_answer")
                 response = get_fallback_response(question, "business")
                 confidence = 0.7
             else:
-                if not context:
-                    context_text = "No specific information found in the knowledge base."
-                else:
-                    context_texts = []
-                    for doc in context[:5]:  # Limit to top 5 for response generation
-                        source = doc.get('source', 'Unknown')
-                        text = doc.get('text', '')
-                        score = doc.get('score', 0)
-                        context_texts.append(f"Source: {source} (Relevance: {score:.3f})\n{text}")
-                    context_text = "\n\n---\n\n".join(context_texts)
-                
-                system_prompt = """You are a professional business assistant for TechFlow Solutions, a leading software development company. 
-                You help with questions about services, pricing, company information, and business inquiries. 
-                Use the provided context to give accurate, helpful, and professional responses."""
-                
-                user_prompt = f"""Context:\n{context_text}\n\nQuestion: {question}\n\nProvide a comprehensive and professional answer based on the context. If the context doesn't contain relevant information, provide a helpful general response about our business capabilities."""
-                
                 try:
-                    full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                    response_obj = self.chat_model.invoke(full_prompt)
-                    response = response_obj.content if hasattr(response_obj, 'content') else str(response_obj)
+                    with stage(self.config.bot_name, "synthesis"):
+                        response = generate_text(self.chat_model, self._answer_prompt(question, context), on_event)
                     confidence = 0.85 if context else 0.4
                 except Exception as e:
-                    response = "I'm having trouble processing your request right now. Please try again later, or contact us directly for immediate assistance."
+                    record_fallback(self.config.bot_name, "llm_error")
+                    response = self.ERROR_RESPONSE
                     confidence = 0.2
             
-            return {
-                "response": response,
-                "type": "business",
-                "confidence": confidence,
-                "sources": len(context),
-                "reasoning_steps": len(reasoning_log) // 3  # Each step has Think, Act, Observe
-            }
+            result = self._result(response, confidence, context, reasoning_log)
+            if self.chat_model:
+                self.embedding_manager.cache_answer(question, result, index_version)
+            return result
             
         except Exception as e:
-            return {
-                "response": "I'm experiencing technical difficulties. Please try again later or contact our support team.",
-                "type": "business",
-                "confidence": 0.0,
-                "error": str(e)
-            }
+            return self._failure_result(e)
+    
+    @timed_request(request_outcome)
+    async def aask(self, question):
+        """Async ask: LLM, embedding and vector calls are awaited instead of blocking"""
+        try:
+            question = question.strip()
+            
+            cached, index_version = await self.embedding_manager.aget_cached_answer(question)
+            if cached:
+                cached["cached"] = True
+                return cached
+            
+            intent = await self.greeting_handler.adetect_intent(question)
+            greeting = self._greeting_result(question, intent)
+            if greeting:
+                return greeting
+            
+            context, reasoning_log = await self.react_agent.aprocess_query(question)
+            
+            if not self.chat_model:
+                record_fallback(self.config.bot_name, "canned_answer")
+                response = get_fallback_response(question, "business")
+                confidence = 0.7
+            else:
+                try:
+                    with stage(self.config.bot_name, "synthesis"):
+                        response = await agenerate_text(self.chat_model, self._answer_prompt(question, context))
+                    confidence = 0.85 if context else 0.4
+                except Exception as e:
+                    record_fallback(self.config.bot_name, "llm_error")
+                    response = self.ERROR_RESPONSE
+                    confidence = 0.2
+            
+            result = self._result(response, confidence, context, reasoning_log)
+            if self.chat_model:
+                await self.embedding_manager.acache_answer(question, result, index_version)
+            return result
+            
+        except Exception as e:
+            return self._failure_result(e)
+    
+    ERROR_RESPONSE = "I'm having trouble processing your request right now. Please try again later, or contact us directly for immediate assistance."
+    
+    def _greeting_result(self, question, intent):
+        if self.greeting_handler.is_conversational(question, intent):
+            greeting_response = self.greeting_handler.generate_business_greeting_response(question, intent)
+            if greeting_response:
+                return {
+                    "response": greeting_response,
+                    "type": "business_conversational",
+                    "confidence": 0.9
+                }
+        return None
+    
+    @staticmethod
+    def _format_context_document(doc):
+        return f"Source: {doc.get('source', 'Unknown')} (Relevance: {doc.get('score', 0):.3f})\n{doc.get('text', '')}"
+    
+    def _answer_prompt(self, question, context):
+        # Top 5 by score, de-overlapped and fitted to the context token budget
+        context_text, _ = self.context_packer.pack(context)
+        if not context_text:
+            context_text = "No specific information found in the knowledge base."
+        
+        system_prompt = """You are a professional business assistant for TechFlow Solutions, a leading software development company. 
+        You help with questions about services, pricing, company information, and business inquiries. 
+        Use the provided context to give accurate, helpful, and professional responses."""
+        
+        user_prompt = f"""Context:\n{context_text}\n\nQuestion: {question}\n\nProvide a comprehensive and professional answer based on the context. If the context doesn't contain relevant information, provide a helpful general response about our business capabilities."""
+        
+        return f"{system_prompt}\n\n{user_prompt}"
+    
+    def _result(self, response, confidence, context, reasoning_log):
+        return {
+            "response": response,
+            "type": "business",
+            "confidence": confidence,
+            "sources": len(context),
+            "reasoning_steps": len(reasoning_log) // 3  # Each step has Think, Act, Observe
+        }
+    
+    def _failure_result(self, error):
+        return {
+            "response": "I'm experiencing technical difficulties. Please try again later or contact our support team.",
+            "type": "business",
+            "confidence": 0.0,
+            "error": str(error)
+        }
 
 class GreetingHandler:
-    def __init__(self, config):
-        self.llm = None
-        if config.gemini_api_key:
-            self.llm = ChatGoogleGenerativeAI(
-                model=config.chat_model,
-                google_api_key=config.gemini_api_key,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens
-            )
+    def __init__(self, config, embedding_manager=None):
+        self.config = config
+        self.llm = create_chat_model(config)
+        
+        # Local classifier: keywords plus embedding centroids, LLM only when unsure
+        embed_fn = None
+        if embedding_manager is not None and embedding_manager.embedding_model:
+            embed_fn = embedding_manager.embed_queries
+        self.classifier = LocalIntentClassifier(embed_fn)
+        self.confidence_threshold = config.intent_confidence_threshold
+        self._intent_cache = OrderedDict()
+        self._intent_cache_size = 1024
+        self._intent_lock = threading.Lock()
 
+    @timed_stage("intent")
     def detect_intent(self, text):
-        if not self.llm:
-            # Simple keyword-based detection if LLM not available
-            text_lower = text.lower().strip()
-            if any(word in text_lower for word in ["hello", "hi", "hey", "good morning", "good afternoon", "good evening"]):
-                return "greeting"
-            elif any(word in text_lower for word in ["bye", "goodbye", "see you", "farewell"]):
-                return "farewell"
-            elif any(word in text_lower for word in ["thank", "thanks", "appreciate"]):
-                return "thank_you"
-            elif any(word in text_lower for word in ["how are you", "what are you", "who are you", "what can you do"]):
-                return "about_bot"
-            return "other"
-        
-        prompt = f"""
+        key = " ".join(text.lower().split())
+        intent = self._cached_intent(key)
+        if intent is None:
+            intent = self._classify_intent(text)
+            self._remember_intent(key, intent)
+        return intent
+    
+    @timed_stage("intent")
+    async def adetect_intent(self, text):
+        key = " ".join(text.lower().split())
+        intent = self._cached_intent(key)
+        if intent is None:
+            intent = await self._aclassify_intent(text)
+            self._remember_intent(key, intent)
+        return intent
+    
+    def _cached_intent(self, key):
+        with self._intent_lock:
+            if key in self._intent_cache:
+                self._intent_cache.move_to_end(key)
+                return self._intent_cache[key]
+        return None
+    
+    def _remember_intent(self, key, intent):
+        with self._intent_lock:
+            self._intent_cache[key] = intent
+            if len(self._intent_cache) > self._intent_cache_size:
+                self._intent_cache.popitem(last=False)
+    
+    def _intent_prompt(self, text):
+        return f"""
         Classify the following user message into one of these categories: 
         greeting, farewell, thank_you, about_bot, or other.
         
         Message: "{text}"
         Respond with only the category name.
         """
+    
+    def _classify_intent(self, text):
+        intent, confidence = self.classifier.classify(text)
+        if confidence >= self.confidence_threshold or not self.llm:
+            return intent
+        
+        # Escalate only uncertain messages to the LLM
         try:
-            response = self.llm.invoke(prompt)
-            intent = response.content.strip().lower()
+            response = self.llm.invoke(self._intent_prompt(text))
+            llm_intent = response.content.strip().lower()
+            return llm_intent if llm_intent in INTENTS else "other"
+        except:
+            return intent
+    
+    async def _aclassify_intent(self, text):
+        # The local classifier may embed the message, so keep it off the event loop
+        intent, confidence = await run_in_pool(self.classifier.classify, text)
+        if confidence >= self.confidence_threshold or not self.llm:
             return intent
+        
+        try:
+            response = await self.llm.ainvoke(self._intent_prompt(text))
+            llm_intent = response.content.strip().lower()
+            return llm_intent if llm_intent in INTENTS else "other"
         except:
-            return "other"
+            return intent
 
-    def generate_greeting_response(self, text):
-        intent = self.detect_intent(text)
+    def generate_greeting_response(self, text, intent=None):
+        intent = intent or self.detect_intent(text)
         
         if intent == "greeting":
             return "Hello! I'm here to help you with your questions. Feel free to ask me anything!"
@@ -616,13 +1402,13 @@ class GreetingHandler:
         
         return None
 
-    def is_conversational(self, text):
-        intent = self.detect_intent(text)
+    def is_conversational(self, text, intent=None):
+        intent = intent or self.detect_intent(text)
         return intent in ["greeting", "farewell", "thank_you", "about_bot"]
 
-    def generate_business_greeting_response(self, text):
+    def generate_business_greeting_response(self, text, intent=None):
         """Generate business-specific greeting responses"""
-        intent = self.detect_intent(text)
+        intent = intent or self.detect_intent(text)
         
         if intent == "greeting":
             return "Hello! Welcome to TechFlow Solutions. I'm your business assistant, ready to help you with questions about our services, pricing, company information, and more. How can I assist you today?"
@@ -635,9 +1421,9 @@ class GreetingHandler:
         
         return None
 
-    def generate_healthcare_greeting_response(self, text):
+    def generate_healthcare_greeting_response(self, text, intent=None):
         """Generate healthcare-specific greeting responses"""
-        intent = self.detect_intent(text)
+        intent = intent or self.detect_intent(text)
         
         if intent == "greeting":
             return "Hello! I'm your healthcare information assistant. I'm here to provide general health information and answer medical questions. Please remember that this is for educational purposes only and shouldn't replace professional medical advice. How can I help you today?"
@@ -655,79 +1441,111 @@ class SelfAskAgent:
     def __init__(self, config, embedding_manager):
         self.config = config
         self.embedding_manager = embedding_manager
+        self.context_packer = ContextPacker(
+            config.context_token_budget,
+            truncate=config.context_truncate_sentences,
+            bot=config.bot_name
+        )
         
-        if config.gemini_api_key:
-            self.llm = ChatGoogleGenerativeAI(
-                model=config.chat_model,
-                google_api_key=config.gemini_api_key,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens
-            )
-        else:
-            self.llm = None
+        self.llm = create_chat_model(config)
     
+    @timed_stage("decompose")
     def decompose_question(self, main_question):
         """Break down complex question into sub-questions"""
         if not self.llm:
-            # Simple heuristic decomposition
-            if "and" in main_question.lower():
-                parts = main_question.lower().split(" and ")
-                return [part.strip() + "?" if not part.endswith("?") else part.strip() for part in parts]
+            return self._heuristic_decomposition(main_question)
+        
+        try:
+            response = self.llm.invoke(self._decomposition_prompt(main_question))
+            content = response.content if hasattr(response, 'content') else str(response)
+            return self._parse_sub_questions(content, main_question)
+        except:
             return [main_question]
+    
+    @timed_stage("decompose")
+    async def adecompose_question(self, main_question):
+        if not self.llm:
+            return self._heuristic_decomposition(main_question)
         
-        decomposition_prompt = f"""
+        try:
+            content = await agenerate_text(self.llm, self._decomposition_prompt(main_question))
+            return self._parse_sub_questions(content, main_question)
+        except:
+            return [main_question]
+    
+    def _heuristic_decomposition(self, main_question):
+        # Simple heuristic decomposition
+        if "and" in main_question.lower():
+            parts = main_question.lower().split(" and ")
+            return [part.strip() + "?" if not part.endswith("?") else part.strip() for part in parts]
+        return [main_question]
+    
+    def _decomposition_prompt(self, main_question):
+        return f"""
         Break down this health question into 2-3 specific sub-questions that need to be answered to fully address the main question.
         
         Main question: {main_question}
         
         Provide sub-questions as a simple list, one per line, without numbering. Focus on the key components needed to answer comprehensively.
         """
-        
-        try:
-            response = self.llm.invoke(decomposition_prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            
-            # Parse sub-questions
-            sub_questions = []
-            for line in content.strip().split('\n'):
-                line = line.strip()
-                if line and not line.startswith('-') and not line.startswith('•'):
-                    # Clean up numbering and formatting
-                    line = line.lstrip('123456789.- ')
-                    if line and not line.lower().startswith('sub'):
-                        if not line.endswith('?'):
-                            line += '?'
-                        sub_questions.append(line)
-            
-            return sub_questions[:3] if sub_questions else [main_question]
-        except:
-            return [main_question]
     
-    def search_and_answer(self, question):
+    def _parse_sub_questions(self, content, main_question):
+        sub_questions = []
+        for line in content.strip().split('\n'):
+            line = line.strip()
+            if line and not line.startswith('-') and not line.startswith('•'):
+                # Clean up numbering and formatting
+                line = line.lstrip('123456789.- ')
+                if line and not line.lower().startswith('sub'):
+                    if not line.endswith('?'):
+                        line += '?'
+                    sub_questions.append(line)
+        
+        return sub_questions[:3] if sub_questions else [main_question]
+    
+    NO_INFORMATION = {
+        "answer": "I don't have specific information about this topic in my knowledge base.",
+        "confidence": 0.2,
+        "sources": []
+    }
+    
+    @timed_stage("sub_answer")
+    def search_and_answer(self, question, search_results=None):
         """Search for information and provide answer for a specific question"""
-        # Search for relevant information
-        search_results = self.embedding_manager.search_similar(question, top_k=5)
+        # Search for relevant information unless it was retrieved in a batch already
+        if search_results is None:
+            search_results = self.embedding_manager.search_similar(question, top_k=5)
         
         if not search_results:
+            return dict(self.NO_INFORMATION)
+        
+        context, sources = self._answer_context(search_results)
+        
+        # Generate answer using LLM
+        if not self.llm:
             return {
-                "answer": "I don't have specific information about this topic in my knowledge base.",
-                "confidence": 0.2,
-                "sources": []
+                "answer": f"Based on available information: {context[:300]}...",
+                "confidence": 0.5,
+                "sources": sources[:3]
             }
         
-        # Prepare context from search results
-        context_texts = []
-        sources = []
-        for doc in search_results:
-            source = doc.get('source', 'Medical Database')
-            text = doc.get('text', '')
-            score = doc.get('score', 0)
-            context_texts.append(f"{text}")
-            sources.append(source)
+        try:
+            response = self.llm.invoke(self._answer_prompt(question, context))
+            answer = response.content if hasattr(response, 'content') else str(response)
+            return self._answer_result(answer, search_results, sources)
+        except:
+            return self._context_only_answer(context, sources)
+    
+    @timed_stage("sub_answer")
+    async def asearch_and_answer(self, question, search_results=None):
+        if search_results is None:
+            search_results = await self.embedding_manager.asearch_similar(question, top_k=5)
         
-        context = "\n\n".join(context_texts)
+        if not search_results:
+            return dict(self.NO_INFORMATION)
+        
+        context, sources = self._answer_context(search_results)
         
-        # Generate answer using LLM
         if not self.llm:
             return {
                 "answer": f"Based on available information: {context[:300]}...",
@@ -735,7 +1553,19 @@ class SelfAskAgent:
                 "sources": sources[:3]
             }
         
-        answer_prompt = f"""
+        try:
+            answer = await agenerate_text(self.llm, self._answer_prompt(question, context))
+            return self._answer_result(answer, search_results, sources)
+        except:
+            return self._context_only_answer(context, sources)
+    
+    def _answer_context(self, search_results):
+        """Prepare context text and sources from the search results that fit the context budget"""
+        context, packed = self.context_packer.pack(search_results)
+        return context, [doc.get('source', 'Medical Database') for doc in packed]
+    
+    def _answer_prompt(self, question, context):
+        return f"""
         Based on the following medical information, provide a clear and accurate answer to the question.
         
         Question: {question}
@@ -745,59 +1575,140 @@ class SelfAskAgent:
         
         Provide a helpful, accurate answer based on the information above. Be concise but comprehensive.
         """
+    
+    def _answer_result(self, answer, search_results, sources):
+        # Calculate confidence based on search results quality
+        avg_score = sum(doc.get('score', 0) for doc in search_results) / len(search_results)
+        confidence = min(0.9, max(0.3, avg_score * 1.2))
         
-        try:
-            response = self.llm.invoke(answer_prompt)
-            answer = response.content if hasattr(response, 'content') else str(response)
-            
-            # Calculate confidence based on search results quality
-            avg_score = sum(doc.get('score', 0) for doc in search_results) / len(search_results)
-            confidence = min(0.9, max(0.3, avg_score * 1.2))
-            
-            return {
-                "answer": answer,
-                "confidence": confidence,
-                "sources": sources[:3]
-            }
-        except:
-            return {
-                "answer": f"Based on available medical information, here's what I found: {context[:200]}...",
-                "confidence": 0.4,
-                "sources": sources[:2]
-            }
+        return {
+            "answer": answer,
+            "confidence": confidence,
+            "sources": sources[:3]
+        }
+    
+    def _context_only_answer(self, context, sources):
+        record_fallback(self.config.bot_name, "llm_error")
+        return {
+            "answer": f"Based on available medical information, here's what I found: {context[:200]}...",
+            "confidence": 0.4,
+            "sources": sources[:2]
+        }
+    
+    SUB_QUESTION_FAILED = {
+        "answer": "I couldn't find information for this part of the question.",
+        "confidence": 0.2,
+        "sources": []
+    }
     
-    def self_ask_process(self, main_question):
-        """Main Self-Ask process"""
+    def self_ask_process(self, main_question, on_event=None):
+        """Main Self-Ask process; ``on_event`` receives sub-questions, their answers and synthesis tokens"""
         # Step 1: Decompose the question
         sub_questions = self.decompose_question(main_question)
+        emit(on_event, "sub_questions", questions=sub_questions)
         
-        # Step 2: Answer each sub-question
+        # Step 2: Retrieve for every sub-question with one embedding call and one batched search
+        try:
+            batch_results = self.embedding_manager.search_similar_many(sub_questions, top_k=5)
+        except Exception as e:
+            print(f"Batched sub-question search failed: {e}")
+            batch_results = [None] * len(sub_questions)
+        
+        # Step 3: Answer all sub-questions concurrently, reporting each as it finishes
+        futures = {
+            submit_in_context(subquestion_executor, self.search_and_answer, sub_q, search_results): position
+            for position, (sub_q, search_results) in enumerate(zip(sub_questions, batch_results))
+        }
+        results = [None] * len(sub_questions)
+        
+        for future in as_completed(futures):
+            position = futures[future]
+            sub_q = sub_questions[position]
+            try:
+                result = future.result()
+            except Exception as e:
+                # One failing sub-question should not sink the others
+                print(f"Sub-question failed: {sub_q[:50]}... ({e})")
+                record_fallback(self.config.bot_name, "sub_question_failed")
+                result = dict(self.SUB_QUESTION_FAILED)
+            results[position] = result
+            emit(on_event, "sub_answer", index=position, question=sub_q,
+                 answer=result["answer"], confidence=result["confidence"])
+        
+        sub_answers, all_sources = self._collect_sub_answers(sub_questions, results)
+        
+        # Step 4: Synthesize final answer
+        if not self.llm:
+            final_answer = self._combined_answer(sub_answers, "Here's what I found:")
+        else:
+            try:
+                with stage(self.config.bot_name, "synthesis"):
+                    final_answer = generate_text(self.llm, self._synthesis_prompt(main_question, sub_answers), on_event)
+            except:
+                record_fallback(self.config.bot_name, "llm_error")
+                final_answer = self._combined_answer(sub_answers, "Based on my analysis:")
+        
+        return self._self_ask_result(main_question, final_answer, sub_questions, sub_answers, all_sources)
+    
+    async def aself_ask_process(self, main_question):
+        """Self-Ask with awaited LLM calls; sub-questions are answered as concurrent coroutines"""
+        sub_questions = await self.adecompose_question(main_question)
+        
+        try:
+            batch_results = await self.embedding_manager.asearch_similar_many(sub_questions, top_k=5)
+        except Exception as e:
+            print(f"Batched sub-question search failed: {e}")
+            batch_results = [None] * len(sub_questions)
+        
+        results = await asyncio.gather(*[
+            self.asearch_and_answer(sub_q, search_results)
+            for sub_q, search_results in zip(sub_questions, batch_results)
+        ], return_exceptions=True)
+        for position, result in enumerate(results):
+            if isinstance(result, Exception):
+                print(f"Sub-question failed: {sub_questions[position][:50]}... ({result})")
+                record_fallback(self.config.bot_name, "sub_question_failed")
+                results[position] = dict(self.SUB_QUESTION_FAILED)
+        
+        sub_answers, all_sources = self._collect_sub_answers(sub_questions, results)
+        
+        if not self.llm:
+            final_answer = self._combined_answer(sub_answers, "Here's what I found:")
+        else:
+            try:
+                with stage(self.config.bot_name, "synthesis"):
+                    final_answer = await agenerate_text(self.llm, self._synthesis_prompt(main_question, sub_answers))
+            except:
+                record_fallback(self.config.bot_name, "llm_error")
+                final_answer = self._combined_answer(sub_answers, "Based on my analysis:")
+        
+        return self._self_ask_result(main_question, final_answer, sub_questions, sub_answers, all_sources)
+    
+    def _collect_sub_answers(self, sub_questions, results):
+        """Sub-answers and sources in the original sub-question order"""
         sub_answers = []
         all_sources = []
-        
-        for sub_q in sub_questions:
-            result = self.search_and_answer(sub_q)
+        for sub_q, result in zip(sub_questions, results):
             sub_answers.append({
                 "question": sub_q,
                 "answer": result["answer"],
                 "confidence": result["confidence"]
             })
             all_sources.extend(result["sources"])
+        return sub_answers, all_sources
+    
+    def _combined_answer(self, sub_answers, heading):
+        # Simple synthesis without LLM
+        combined_answer = "\n\n".join([f"• {sa['answer']}" for sa in sub_answers])
+        return f"{heading}\n\n{combined_answer}"
+    
+    def _synthesis_prompt(self, main_question, sub_answers):
+        sub_answers_text = "\n\n".join([
+            f"Q: {sa['question']}\nA: {sa['answer']}" 
+            for sa in sub_answers
+        ])
         
-        # Step 3: Synthesize final answer
-        if not self.llm:
-            # Simple synthesis without LLM
-            combined_answer = "\n\n".join([f"• {sa['answer']}" for sa in sub_answers])
-            final_answer = f"Here's what I found:\n\n{combined_answer}"
-            avg_confidence = sum(sa['confidence'] for sa in sub_answers) / len(sub_answers)
-        else:
-            # Use LLM for sophisticated synthesis
-            sub_answers_text = "\n\n".join([
-                f"Q: {sa['question']}\nA: {sa['answer']}" 
-                for sa in sub_answers
-            ])
-            
-            synthesis_prompt = f"""
+        return f"""
             Based on the following sub-questions and answers, provide a comprehensive response to the main question.
             
             Main Question: {main_question}
@@ -807,91 +1718,165 @@ class SelfAskAgent:
             
             Synthesize this information into a complete, well-structured answer to the main question.
             """
-            
-            try:
-                response = self.llm.invoke(synthesis_prompt)
-                final_answer = response.content if hasattr(response, 'content') else str(response)
-                avg_confidence = sum(sa['confidence'] for sa in sub_answers) / len(sub_answers)
-            except:
-                combined_answer = "\n\n".join([f"• {sa['answer']}" for sa in sub_answers])
-                final_answer = f"Based on my analysis:\n\n{combined_answer}"
-                avg_confidence = sum(sa['confidence'] for sa in sub_answers) / len(sub_answers)
-        
+    
+    def _self_ask_result(self, main_question, final_answer, sub_questions, sub_answers, all_sources):
         return {
             "question": main_question,
             "answer": final_answer,
-            "confidence": avg_confidence,
+            "confidence": sum(sa['confidence'] for sa in sub_answers) / len(sub_answers),
             "sources": list(set(all_sources)),  # Remove duplicates
             "sub_questions": sub_questions,
             "sub_answers": sub_answers
         }
 
+MEDICAL_DISCLAIMER = "\n\n⚠️ **Medical Disclaimer**: This information is for educational purposes only and should not replace professional medical advice. Please consult with a healthcare provider for medical concerns."
+
 class HealthcareBot:
     def __init__(self):
         self.config = HealthcareConfig()
         self.embedding_manager = EmbeddingManager(self.config)
         self.self_ask_agent = SelfAskAgent(self.config, self.embedding_manager)
-        self.greeting_handler = GreetingHandler(self.config)
+        self.greeting_handler = GreetingHandler(self.config, self.embedding_manager)
         
-    def ask(self, question):
+    @timed_request(request_outcome)
+    def ask(self, question, on_event=None):
+        """Answer a health question; ``on_event`` receives Self-Ask progress and answer tokens"""
         try:
             question = question.strip()
             
-            # Handle greetings and conversational inputs
-            if self.greeting_handler.is_conversational(question):
-                greeting_response = self.greeting_handler.generate_healthcare_greeting_response(question)
-                if greeting_response:
-                    return {
-                        "response": greeting_response,
-                        "type": "healthcare_conversational",
-                        "confidence": 0.9
-                    }
+            # Serve paraphrases of already-answered questions from the semantic cache
+            cached, index_version = self.embedding_manager.get_cached_answer(question)
+            if cached:
+                cached["cached"] = True
+                return cached
             
-            # Check if API is available for proper processing
-            if not self.config.gemini_api_key or not self.config.pinecone_api_key:
-                # Use fallback response when API keys are not available
-                fallback_response = get_fallback_response(question, "healthcare")
-                medical_disclaimer = "\n\n⚠️ **Medical Disclaimer**: This information is for educational purposes only and should not replace professional medical advice. Please consult with a healthcare provider for medical concerns."
-                
-                return {
-                    "response": fallback_response + medical_disclaimer,
-                    "type": "healthcare",
-                    "confidence": 0.7,
-                    "sources": 1,
-                    "mode": "fallback"
-                }
+            # Handle greetings and conversational inputs
+            intent = self.greeting_handler.detect_intent(question)
+            early_result = self._greeting_result(question, intent) or self._fallback_result(question)
+            if early_result:
+                return early_result
             
             # Use Self-Ask agent for medical questions
-            self_ask_result = self.self_ask_agent.self_ask_process(question)
+            self_ask_result = self.self_ask_agent.self_ask_process(question, on_event)
             
             # Add medical disclaimer
-            medical_disclaimer = "\n\n⚠️ **Medical Disclaimer**: This information is for educational purposes only and should not replace professional medical advice. Please consult with a healthcare provider for medical concerns."
+            emit(on_event, "token", text=MEDICAL_DISCLAIMER)
+            result = self._result(self_ask_result)
             
-            response = self_ask_result["answer"] + medical_disclaimer
+            self.embedding_manager.cache_answer(question, result, index_version)
+            return result
             
-            result = {
-                "response": response,
-                "type": "healthcare",
-                "confidence": self_ask_result["confidence"],
-                "sources": len(self_ask_result["sources"]),
-                "sub_questions_count": len(self_ask_result["sub_questions"])
-            }
+        except Exception as e:
+            return self._failure_result(e)
+    
+    @timed_request(request_outcome)
+    async def aask(self, question):
+        """Async ask: LLM, embedding and vector calls are awaited instead of blocking"""
+        try:
+            question = question.strip()
+            
+            cached, index_version = await self.embedding_manager.aget_cached_answer(question)
+            if cached:
+                cached["cached"] = True
+                return cached
+            
+            intent = await self.greeting_handler.adetect_intent(question)
+            early_result = self._greeting_result(question, intent) or self._fallback_result(question)
+            if early_result:
+                return early_result
             
+            result = self._result(await self.self_ask_agent.aself_ask_process(question))
+            await self.embedding_manager.acache_answer(question, result, index_version)
             return result
             
         except Exception as e:
-            return {
-                "response": "I'm experiencing technical difficulties with healthcare information retrieval. Please consult with a healthcare professional for medical advice.",
-                "type": "healthcare",
-                "confidence": 0.0,
-                "error": str(e)
-            }
+            return self._failure_result(e)
+    
+    def _greeting_result(self, question, intent):
+        if self.greeting_handler.is_conversational(question, intent):
+            greeting_response = self.greeting_handler.generate_healthcare_greeting_response(question, intent)
+            if greeting_response:
+                return {
+                    "response": greeting_response,
+                    "type": "healthcare_conversational",
+                    "confidence": 0.9
+                }
+        return None
+    
+    def _fallback_result(self, question):
+        """Canned answer when the API key or vector index is not available"""
+        if self.config.gemini_api_key and self.embedding_manager.index:
+            return None
+        
+        record_fallback(self.config.bot_name, "canned_answer")
+        return {
+            "response": get_fallback_response(question, "healthcare") + MEDICAL_DISCLAIMER,
+            "type": "healthcare",
+            "confidence": 0.7,
+            "sources": 1,
+            "mode": "fallback"
+        }
+    
+    def _result(self, self_ask_result):
+        return {
+            "response": self_ask_result["answer"] + MEDICAL_DISCLAIMER,
+            "type": "healthcare",
+            "confidence": self_ask_result["confidence"],
+            "sources": len(self_ask_result["sources"]),
+            "sub_questions_count": len(self_ask_result["sub_questions"])
+        }
+    
+    def _failure_result(self, error):
+        return {
+            "response": "I'm experiencing technical difficulties with healthcare information retrieval. Please consult with a healthcare professional for medical advice.",
+            "type": "healthcare",
+            "confidence": 0.0,
+            "error": str(error)
+        }
+
+# Bots are built on first use (or by the warm-up thread) instead of at import time
+BOT_CLASSES = {'business': BusinessBot, 'healthcare': HealthcareBot}
+_bots = {}
+_bot_locks = {bot_type: threading.Lock() for bot_type in BOT_CLASSES}
+
+def get_bot(bot_type, build=True):
+    """Return the bot for a botType, building it on first use; None if it is unknown"""
+    bot = _bots.get(bot_type)
+    if bot is not None or not build or bot_type not in BOT_CLASSES:
+        return bot
+    
+    with _bot_locks[bot_type]:
+        if bot_type not in _bots:
+            print(f"🤖 Initializing {bot_type} bot...")
+            _bots[bot_type] = BOT_CLASSES[bot_type]()
+        return _bots[bot_type]
+
+def warm_up_bots():
+    """Build every bot so the first requests do not pay for it"""
+    start = time.perf_counter()
+    for bot_type in BOT_CLASSES:
+        try:
+            get_bot(bot_type)
+        except Exception as e:
+            print(f"❌ Could not initialize {bot_type} bot: {e}")
+    print(f"✅ Bots initialized in {time.perf_counter() - start:.2f}s")
+
+# "background" (default) builds bots on a daemon thread, "eager" before import returns,
+# "lazy" only when the first request for each bot arrives
+BOT_WARMUP = os.getenv('BOT_WARMUP', 'background')
+if BOT_WARMUP == 'eager':
+    warm_up_bots()
+elif BOT_WARMUP == 'background':
+    threading.Thread(target=warm_up_bots, name="bot-warmup", daemon=True).start()
 
-# Initialize bots
-print("🤖 Initializing AI QA Bot System...")
-business_bot = BusinessBot()
-healthcare_bot = HealthcareBot()
-print("✅ Both bots initialized successfully!")
+def apply_fallback(result, message, bot_type):
+    """Replace a failed answer with the canned fallback response"""
+    if result.get("confidence", 0) == 0.0:
+        record_fallback(bot_type, "failed_answer")
+        fallback_response = get_fallback_response(message, bot_type)
+        result["response"] = fallback_response
+        result["confidence"] = 0.5  # Default fallback confidence
+    return result
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -906,18 +1891,11 @@ def chat():
         print(f"🔄 Processing {bot_type} query: {message[:50]}...")
         
         # Route to appropriate bot
-        if bot_type == 'business':
-            result = business_bot.ask(message)
-        elif bot_type == 'healthcare':
-            result = healthcare_bot.ask(message)
-        else:
+        bot = get_bot(bot_type)
+        if not bot:
             return jsonify({"error": "Invalid bot type. Use 'business' or 'healthcare'"}), 400
         
-        # Fallback response if no API key is available
-        if result.get("confidence", 0) == 0.0:
-            fallback_response = get_fallback_response(message, bot_type)
-            result["response"] = fallback_response
-            result["confidence"] = 0.5  # Default fallback confidence
+        result = apply_fallback(bot.ask(message), message, bot_type)
         
         print(f"✅ Response generated with confidence: {result.get('confidence', 0):.2f}")
         return jsonify(result)
@@ -926,18 +1904,112 @@ def chat():
         print(f"❌ Error processing request: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/health', methods=['GET'])
-def health():
-    return jsonify({
+def format_event(event, as_ndjson=False):
+    """Serialize one event as an SSE frame or an NDJSON line"""
+    payload = json.dumps(event)
+    if as_ndjson:
+        return payload + "\n"
+    return f"event: {event['type']}\ndata: {payload}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream agent progress and answer tokens as Server-Sent Events (or NDJSON)"""
+    data = request.get_json() or {}
+    message = data.get('message', '')
+    bot_type = data.get('botType', 'business')
+    
+    if not message:
+        return jsonify({"error": "Message is required"}), 400
+    
+    bot = get_bot(bot_type)
+    if not bot:
+        return jsonify({"error": "Invalid bot type. Use 'business' or 'healthcare'"}), 400
+    
+    as_ndjson = request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+    events = queue.Queue()
+    
+    def run():
+        # The pipeline runs on its own thread and feeds the queue as it goes
+        try:
+            result = apply_fallback(bot.ask(message, on_event=events.put), message, bot_type)
+            events.put({"type": "done", "result": result})
+        except Exception as e:
+            print(f"❌ Error streaming request: {str(e)}")
+            events.put({"type": "error", "error": str(e)})
+    
+    def generate():
+        print(f"🔄 Streaming {bot_type} query: {message[:50]}...")
+        yield format_event({"type": "start", "botType": bot_type}, as_ndjson)
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            try:
+                event = events.get(timeout=15)
+            except queue.Empty:
+                # Keep proxies from closing an idle connection while the LLM thinks
+                yield "\n" if as_ndjson else ": keep-alive\n\n"
+                continue
+            yield format_event(event, as_ndjson)
+            if event["type"] in ("done", "error"):
+                break
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson' if as_ndjson else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def health_status():
+    answer_cache = {}
+    for bot_type in BOT_CLASSES:
+        bot = get_bot(bot_type, build=False)
+        cache = bot.embedding_manager.answer_cache if bot else None
+        answer_cache[bot_type] = cache.stats() if cache else None
+    
+    return {
         "status": "healthy",
-        "bots": ["business", "healthcare"],
-        "features": ["ReACT for business", "Self-Ask for healthcare"]
-    })
+        "bots": list(BOT_CLASSES),
+        "ready": [bot_type for bot_type in BOT_CLASSES if get_bot(bot_type, build=False)],
+        "features": ["ReACT for business", "Self-Ask for healthcare"],
+        "embedding_cache": get_embedding_cache().stats(),
+        "embedding_batching": embedding_batcher_stats(),
+        "clients": get_client_registry().stats(),
+        "answer_cache": answer_cache
+    }
 
-@app.route('/api/info', methods=['GET'])
-def info():
+def metrics_snapshot():
+    """Cache, batcher and LLM pool figures for /api/metrics, read at scrape time"""
+    embedding_cache = get_embedding_cache().stats()
+    yield "qa_embedding_cache_hits_total", "counter", "Query embedding cache hits", [({}, embedding_cache["hits"])]
+    yield "qa_embedding_cache_misses_total", "counter", "Query embedding cache misses", [({}, embedding_cache["misses"])]
+    yield "qa_embedding_cache_hit_ratio", "gauge", "Query embedding cache hit ratio", [({}, embedding_cache["hit_ratio"])]
+    
+    answer_caches = {}
+    for bot_type in BOT_CLASSES:
+        bot = get_bot(bot_type, build=False)
+        if bot and bot.embedding_manager.answer_cache:
+            answer_caches[bot_type] = bot.embedding_manager.answer_cache.stats()
+    yield "qa_answer_cache_hits_total", "counter", "Semantic answer cache hits", [
+        ({"bot": bot_type}, stats["hits"]) for bot_type, stats in answer_caches.items()]
+    yield "qa_answer_cache_misses_total", "counter", "Semantic answer cache misses", [
+        ({"bot": bot_type}, stats["misses"]) for bot_type, stats in answer_caches.items()]
+    yield "qa_answer_cache_hit_ratio", "gauge", "Semantic answer cache hit ratio", [
+        ({"bot": bot_type}, stats["hit_ratio"]) for bot_type, stats in answer_caches.items()]
+    
+    batchers = embedding_batcher_stats()
+    yield "qa_embedding_batches_total", "counter", "Micro-batched embedding calls", [
+        ({"model": model}, stats["batches"]) for model, stats in batchers.items()]
+    yield "qa_embedding_batch_items_total", "counter", "Queries embedded through the micro-batcher", [
+        ({"model": model}, stats["items"]) for model, stats in batchers.items()]
+    
+    chat_models = get_client_registry().stats()["chat_models"]
+    yield "qa_llm_in_flight", "gauge", "LLM calls currently in flight", [
+        ({"model": model}, stats["in_flight"]) for model, stats in chat_models.items()]
+
+REGISTRY.register_callback(metrics_snapshot)
+
+def system_info():
     """Get information about the bot system"""
-    return jsonify({
+    return {
         "system": "Dual AI QA Bot System",
         "bots": {
             "business": {
@@ -952,7 +2024,93 @@ def info():
             }
         },
         "note": "All healthcare information is for educational purposes only"
-    })
+    }
+
+def prewarm_embeddings(items):
+    """Embed every batch message per bot in one call so each ask() hits the embedding cache"""
+    messages_by_bot = {}
+    for item in items:
+        if "error" not in item:
+            messages_by_bot.setdefault(item["botType"], []).append(item["message"].strip())
+    
+    for bot_type, messages in messages_by_bot.items():
+        # Best effort: a bot that fails to build here fails its items in answer_batch_item instead
+        try:
+            embedding_manager = get_bot(bot_type).embedding_manager
+            if not embedding_manager.embedding_model:
+                continue
+            for start in range(0, len(messages), 100):
+                embedding_manager.embed_queries(messages[start:start + 100])
+        except Exception as e:
+            print(f"⚠️  Batch embedding for {bot_type} failed, items will embed individually: {e}")
+
+def answer_batch_item(index, item):
+    """Answer one batch item; failures are reported on the item instead of failing the batch"""
+    if "error" in item:
+        return {"index": index, "error": item["error"]}
+    try:
+        result = apply_fallback(get_bot(item["botType"]).ask(item["message"]), item["message"], item["botType"])
+        return {"index": index, **result}
+    except Exception as e:
+        return {"index": index, "error": str(e)}
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer many {message, botType} items with shared embedding and bounded parallel LLM calls"""
+    data = request.get_json() or {}
+    raw_items = data.get('items')
+    if not isinstance(raw_items, list) or not raw_items:
+        return jsonify({"error": "items must be a non-empty list of {message, botType}"}), 400
+    if len(raw_items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} items per batch"}), 400
+    
+    items = []
+    for raw in raw_items:
+        raw = raw if isinstance(raw, dict) else {}
+        message = raw.get('message', '')
+        bot_type = raw.get('botType', 'business')
+        if not isinstance(message, str) or not message.strip():
+            items.append({"error": "Message is required and must be a string"})
+        elif bot_type not in BOT_CLASSES:
+            items.append({"error": "Invalid bot type. Use 'business' or 'healthcare'"})
+        else:
+            items.append({"message": message, "botType": bot_type})
+    
+    as_ndjson = data.get('stream') or request.args.get('format') == 'ndjson'
+    print(f"🔄 Processing batch of {len(items)} queries...")
+    start = time.perf_counter()
+    prewarm_embeddings(items)
+    futures = [batch_executor.submit(answer_batch_item, index, item) for index, item in enumerate(items)]
+    
+    if as_ndjson:
+        def generate():
+            # Stream each result as soon as it is ready; "index" ties it back to the request
+            try:
+                for future in as_completed(futures):
+                    yield json.dumps(future.result()) + "\n"
+            finally:
+                for future in futures:
+                    future.cancel()
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    results = [future.result() for future in futures]
+    errors = sum(1 for result in results if "error" in result)
+    print(f"✅ Batch of {len(results)} answered in {time.perf_counter() - start:.2f}s ({errors} errors)")
+    return jsonify({"results": results, "count": len(results), "errors": errors})
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify(health_status())
+
+@app.route('/api/info', methods=['GET'])
+def info():
+    """Get information about the bot system"""
+    return jsonify(system_info())
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the request-path metrics"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     print("🚀 Starting Dual AI QA Bot System...")
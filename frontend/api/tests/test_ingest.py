@@ -0,0 +1,38 @@
+import ingest
+from vector_file import MappedVectorStore
+
+CONTENT = "AAAA BBBB AAAA"
+SPANS = [(0, 4), (5, 9), (10, 14)]
+
+
+def chunk_documents(documents):
+    for document in documents:
+        spans = [span for span in SPANS if span[1] <= len(document['content'])]
+        yield document, ingest.chunks_from_spans(document, document['content'], spans)
+
+
+def test_repeated_chunks_get_distinct_ids():
+    chunks = ingest.chunks_from_spans({'source': 'a.txt'}, CONTENT, SPANS)
+    ids = [chunk['id'] for chunk in chunks]
+    assert len(set(ids)) == 3
+    assert ids[2] == f"{ids[0]}-1"
+
+
+def test_stale_repeated_chunk_is_removed_from_vector_file(tmp_path):
+    manifest_path, index_path = str(tmp_path / "m.json"), str(tmp_path / "v.vec")
+
+    manifest, sink = ingest.IndexManifest(manifest_path), ingest.VectorFileSink(index_path)
+    chunks = list(manifest.changed_chunks([{'source': 'a.txt', 'content': CONTENT}], chunk_documents))
+    sink.upsert([(chunk['id'], [1.0, float(i)], {'text': chunk['text']}) for i, chunk in enumerate(chunks)])
+    sink.flush()
+    manifest.commit()
+
+    manifest, sink = ingest.IndexManifest(manifest_path), ingest.VectorFileSink(index_path)
+    assert list(manifest.changed_chunks([{'source': 'a.txt', 'content': "AAAA BBBB"}], chunk_documents)) == []
+    sink.delete(manifest.stale_ids())
+    sink.flush()
+    manifest.commit()
+
+    store = MappedVectorStore(index_path)
+    assert store.ids == [chunks[0]['id'], chunks[1]['id']]
+    store.close()
@@ -0,0 +1,62 @@
+import pytest
+
+from intent_classifier import LocalIntentClassifier
+
+
+@pytest.fixture
+def classifier():
+    return LocalIntentClassifier()
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("hello", "greeting"),
+    ("Hi there!", "greeting"),
+    ("hey everyone", "greeting"),
+    ("bye", "farewell"),
+    ("thanks so much", "thank_you"),
+    ("who are you?", "about_bot"),
+])
+def test_bare_conversational_messages_short_circuit(classifier, text, intent):
+    assert classifier.classify(text) == (intent, 0.95)
+
+
+@pytest.mark.parametrize("text", [
+    "hi, how much is an app?",
+    "hello what do you charge",
+    "hey, price of a website",
+    "hi cost of hosting",
+    "good morning, do you build apps?",
+    "thanks, what about mobile apps?",
+])
+def test_greeting_prefixed_questions_are_not_short_circuited(classifier, text):
+    intent, confidence = classifier.classify(text)
+    assert confidence < 0.95
+    assert intent == "other"
+
+
+def test_greeting_ending_in_question_mark_goes_to_centroids(classifier):
+    # A greeting centroid example, but "?" keeps it off the keyword shortcut
+    assert classifier.classify("hello, anyone there?")[1] < 0.95
+
+
+def test_what_do_you_do_is_not_a_keyword_match(classifier):
+    assert classifier.match_keywords("what do you do")[0] is None
+
+
+def test_question_words_are_kept_in_the_remainder(classifier):
+    intent, remainder = classifier.match_keywords("hi, how much does it cost?")
+    assert intent == "greeting"
+    assert {"how", "cost"} <= set(remainder)
+
+
+def test_greeting_prefixed_question_falls_through_to_centroids():
+    calls = []
+
+    def embed_fn(texts):
+        calls.append(list(texts))
+        # Every text embeds the same, so the centroid path picks a label with low confidence
+        return [[1.0, 0.0] for _ in texts]
+
+    intent, confidence = LocalIntentClassifier(embed_fn).classify("hi, how much is an app?")
+    assert calls[-1] == ["hi, how much is an app?"]
+    assert confidence < 0.5
@@ -0,0 +1,105 @@
+"""
+Token-aware text splitting for the AI QA Bot ingestion pipeline
+Works like RecursiveCharacterTextSplitter (paragraphs, then lines, then
+words, then a hard cut) but measures length in model tokens with tiktoken
+instead of characters, and returns (start, end) character offsets into the
+source text rather than copies of every chunk. ingest.py ships only those
+offsets back from its worker processes and slices the text when embedding.
+"""
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+class TokenChunker:
+    """Split text into spans of at most ``chunk_tokens`` tokens overlapping by ~``overlap_tokens``"""
+
+    def __init__(self, chunk_tokens=256, overlap_tokens=32, encoding="cl100k_base", separators=None):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.separators = separators or DEFAULT_SEPARATORS
+        if isinstance(encoding, str):
+            import tiktoken
+            encoding = tiktoken.get_encoding(encoding)
+        self.encoding = encoding
+
+    def count_tokens(self, text):
+        return len(self.encoding.encode_ordinary(text))
+
+    def spans(self, text):
+        """(start, end) offsets of the chunks of ``text``, in order"""
+        if not text.strip():
+            return []
+        pieces = self._pieces(text, 0, len(text), self.separators)
+        return self._merge(text, pieces)
+
+    def split_text(self, text):
+        return [text[start:end] for start, end in self.spans(text)]
+
+    def _pieces(self, text, start, end, separators):
+        """(start, end, tokens) pieces of text[start:end], each within the token budget"""
+        separator, remaining = separators[0], separators[1:]
+        for i, candidate in enumerate(separators):
+            if candidate == "" or text.find(candidate, start, end) != -1:
+                separator, remaining = candidate, separators[i + 1:]
+                break
+        if separator == "":
+            return self._hard_split(text, start, end)
+
+        # Cut after each separator so it stays attached to the preceding piece
+        bounds = []
+        position = start
+        while position < end:
+            found = text.find(separator, position, end)
+            cut = end if found == -1 else found + len(separator)
+            bounds.append((position, cut))
+            position = cut
+
+        counts = [len(tokens) for tokens in
+                  self.encoding.encode_ordinary_batch([text[a:b] for a, b in bounds], num_threads=1)]
+        pieces = []
+        for (a, b), tokens in zip(bounds, counts):
+            if tokens <= self.chunk_tokens:
+                pieces.append((a, b, tokens))
+            else:
+                pieces.extend(self._pieces(text, a, b, remaining or [""]))
+        return pieces
+
+    def _hard_split(self, text, start, end):
+        """Cut at token boundaries when no separator is left"""
+        tokens = self.encoding.encode_ordinary(text[start:end])
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        pieces = []
+        for first in range(0, len(tokens), self.chunk_tokens):
+            last = min(first + self.chunk_tokens, len(tokens))
+            a = start + offsets[first]
+            b = start + offsets[last] if last < len(tokens) else end
+            if b > a:
+                pieces.append((a, b, last - first))
+        return pieces
+
+    def _merge(self, text, pieces):
+        """Greedily pack consecutive pieces into chunks, carrying trailing pieces over as overlap"""
+        spans = []
+        window = []
+        total = 0
+        for piece in pieces:
+            if window and total + piece[2] > self.chunk_tokens:
+                spans.append(self._trim(text, window[0][0], window[-1][1]))
+                while window and (total > self.overlap_tokens or total + piece[2] > self.chunk_tokens):
+                    total -= window.pop(0)[2]
+            window.append(piece)
+            total += piece[2]
+        if window:
+            spans.append(self._trim(text, window[0][0], window[-1][1]))
+        return [(start, end) for start, end in spans if end > start]
+
+    @staticmethod
+    def _trim(text, start, end):
+        """Shrink a span past surrounding whitespace, as the character splitter strips chunks"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
@@ -0,0 +1,223 @@
+"""
+Memory-mapped on-disk vector index format for the AI QA Bot backend
+
+Layout (all integers little-endian):
+
+    magic           8 bytes   b"RAGVEC01"
+    header_length   uint32
+    header          JSON manifest, padded so every section is 64-byte aligned
+    vectors         count x dimension float16/float32, L2-normalized
+    text_offsets    uint64[count + 1] into the text blob
+    text_blob       UTF-8 chunk texts
+    meta_offsets    uint64[count + 1] into the metadata blob
+    meta_blob       one UTF-8 JSON object per record (id, source, ...)
+
+Opening a file only parses the header; vectors and texts are read straight
+from the page cache, so startup is O(1) and worker processes share pages.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+import numpy as np
+from typing import Dict, Any, Optional
+
+from vector_store import VectorSearch, normalize_rows
+
+MAGIC = b"RAGVEC01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def _pad(length):
+    return (-length) % ALIGNMENT
+
+
+def _blob_with_offsets(items):
+    encoded = [item.encode('utf-8') for item in items]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    if encoded:
+        offsets[1:] = np.cumsum([len(item) for item in encoded])
+    return offsets, b"".join(encoded)
+
+
+def write_vector_file(path, store, dtype="float32", manifest: Optional[Dict[str, Any]] = None):
+    """Write any store exposing ``ids``, ``vectors`` and ``metadata`` to ``path``.
+
+    The file is written next to the target and renamed into place, so
+    processes that already mapped the old file keep a consistent view.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"dtype must be one of {SUPPORTED_DTYPES}")
+
+    vectors = normalize_rows(store.vectors).astype(dtype)
+    count = len(store.ids)
+    dimension = vectors.shape[1] if vectors.ndim == 2 else 0
+
+    texts = []
+    records = []
+    for vector_id, meta in zip(store.ids, store.metadata):
+        meta = dict(meta)
+        texts.append(meta.pop('text', ''))
+        meta['id'] = vector_id
+        records.append(json.dumps(meta, ensure_ascii=False))
+
+    text_offsets, text_blob = _blob_with_offsets(texts)
+    meta_offsets, meta_blob = _blob_with_offsets(records)
+    sections = [
+        ('vectors', vectors.tobytes()),
+        ('text_offsets', text_offsets.tobytes()),
+        ('text_blob', text_blob),
+        ('meta_offsets', meta_offsets.tobytes()),
+        ('meta_blob', meta_blob),
+    ]
+
+    header = {
+        'version': FORMAT_VERSION,
+        'count': count,
+        'dimension': dimension,
+        'dtype': dtype,
+        'created_at': time.time(),
+        'manifest': manifest or {},
+        'sections': {},
+    }
+
+    # Section offsets depend on the header length, which depends on the
+    # offsets; reserve generous room for the digits and pad the header out.
+    header['sections'] = {name: {'offset': 10 ** 15, 'length': len(data)} for name, data in sections}
+    header_length = len(json.dumps(header).encode('utf-8'))
+    preamble = len(MAGIC) + 4
+    position = preamble + header_length + _pad(preamble + header_length)
+    for name, data in sections:
+        header['sections'][name] = {'offset': position, 'length': len(data)}
+        position += len(data) + _pad(len(data))
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b" " * (header_length - len(header_bytes) + _pad(preamble + header_length))
+
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for _, data in sections:
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(temp_path, path)
+
+
+def read_header(path):
+    """Read just the JSON header of a vector file"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a vector index file")
+        (header_length,) = struct.unpack('<I', f.read(4))
+        return json.loads(f.read(header_length).decode('utf-8'))
+
+
+class MappedVectorStore(VectorSearch):
+    """Read-only vector store backed by an mmap of a file from ``write_vector_file``.
+
+    It has no add / upsert / delete: to change the contents, load it into a
+    ``LocalVectorStore`` and write a new file (as ingest.py does).
+    """
+
+    block_rows = 65536  # rows upcast to float32 at a time for float16 files
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        if self.header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector file version: {self.header['version']}")
+
+        self.manifest = self.header.get('manifest', {})
+        self.dimension = self.header['dimension']
+        self.dtype = self.header['dtype']
+        self._size = self.header['count']
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        sections = self.header['sections']
+        self._matrix = self._section_array('vectors', self.dtype).reshape(self._size, self.dimension)
+        self._text_offsets = self._section_array('text_offsets', '<u8')
+        self._meta_offsets = self._section_array('meta_offsets', '<u8')
+        self._text_start = sections['text_blob']['offset']
+        self._meta_start = sections['meta_blob']['offset']
+        self._ids = None
+
+    def _section_array(self, name, dtype):
+        section = self.header['sections'][name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(
+            self._mmap, dtype=dtype, count=section['length'] // dtype.itemsize, offset=section['offset']
+        )
+
+    @property
+    def vectors(self):
+        return self._matrix
+
+    @property
+    def ids(self):
+        """Record ids, decoded on first use only"""
+        if self._ids is None:
+            self._ids = [self._record(row)['id'] for row in range(self._size)]
+        return self._ids
+
+    @property
+    def metadata(self):
+        return [self._metadata(row) for row in range(self._size)]
+
+    def _slice(self, start, offsets, row):
+        begin = start + int(offsets[row])
+        end = start + int(offsets[row + 1])
+        return self._mmap[begin:end].decode('utf-8')
+
+    def _record(self, row):
+        return json.loads(self._slice(self._meta_start, self._meta_offsets, row))
+
+    def row_metadata(self, row):
+        return self._metadata(row)
+
+    def _metadata(self, row):
+        meta = self._record(row)
+        meta.pop('id', None)
+        meta['text'] = self._slice(self._text_start, self._text_offsets, row)
+        return meta
+
+    def _scores(self, query_vector):
+        if self._matrix.dtype == np.float32:
+            return self._matrix @ query_vector
+
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, self.block_rows):
+            block = self._matrix[start:start + self.block_rows].astype(np.float32)
+            scores[start:start + self.block_rows] = block @ query_vector
+        return scores
+
+    def _scores_many(self, query_matrix):
+        if self._matrix.dtype == np.float32:
+            return self._matrix @ query_matrix.T
+
+        scores = np.empty((self._size, query_matrix.shape[0]), dtype=np.float32)
+        for start in range(0, self._size, self.block_rows):
+            block = self._matrix[start:start + self.block_rows].astype(np.float32)
+            scores[start:start + self.block_rows] = block @ query_matrix.T
+        return scores
+
+    def _match(self, row, score, include_metadata=True):
+        record = self._record(row)
+        match = {'id': record.pop('id'), 'score': float(score)}
+        if include_metadata:
+            record['text'] = self._slice(self._text_start, self._text_offsets, row)
+            match['metadata'] = record
+        return match
+
+    def close(self):
+        self._matrix = None
+        self._text_offsets = None
+        self._meta_offsets = None
+        self._mmap.close()
@@ -0,0 +1,190 @@
+"""
+In-process vector store for the AI QA Bot backend
+Keeps L2-normalized embeddings in one contiguous float32 matrix and answers
+cosine top-k queries with a single matmul plus an argpartition selection.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+
+def normalize_rows(vectors):
+    """L2-normalize a 1-D vector or every row of a 2-D matrix (float32)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores, top_k):
+    """Indices of the top_k highest scores, best first, without a full sort"""
+    n = scores.shape[0]
+    k = min(top_k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorSearch:
+    """Read-only cosine top-k search over ``vectors`` / ``ids`` / ``metadata``.
+
+    ``query`` mirrors the Pinecone ``Index.query`` response shape so a store
+    can be dropped in wherever ``EmbeddingManager`` expects an index.
+    Subclasses that can change their contents add ``add`` / ``upsert`` /
+    ``delete``; read-only stores (``MappedVectorStore``) simply lack them.
+    """
+
+    def __len__(self):
+        return self._size
+
+    def _scores(self, query_vector):
+        """Cosine similarity of a normalized query against every stored row"""
+        return self.vectors @ query_vector
+
+    def _top_k(self, query_vector, top_k):
+        """Return (row indices, scores) of the best top_k rows"""
+        scores = self._scores(query_vector)
+        indices = top_k_indices(scores, top_k)
+        return indices, scores[indices]
+
+    def row_metadata(self, row):
+        """Metadata (including 'text') of one row"""
+        return self.metadata[row]
+
+    def _match(self, row, score, include_metadata=True):
+        match = {'id': self.ids[row], 'score': float(score)}
+        if include_metadata:
+            match['metadata'] = self.row_metadata(row)
+        return match
+
+    def _scores_many(self, query_matrix):
+        """(rows x queries) similarity matrix from one matrix-matrix product"""
+        return self.vectors @ query_matrix.T
+
+    def _top_k_many(self, query_matrix, top_k):
+        scores = self._scores_many(query_matrix)
+        results = []
+        for column in range(query_matrix.shape[0]):
+            column_scores = scores[:, column]
+            indices = top_k_indices(column_scores, top_k)
+            results.append((indices, column_scores[indices]))
+        return results
+
+    def query_many(self, vectors, top_k=5, include_metadata=True):
+        """Batched cosine top-k; returns one Pinecone-shaped response per query"""
+        query_matrix = normalize_rows(np.atleast_2d(vectors))
+        if self._size == 0:
+            return [{'matches': []} for _ in range(query_matrix.shape[0])]
+        return [
+            {'matches': [self._match(row, score, include_metadata) for row, score in zip(indices, scores)]}
+            for indices, scores in self._top_k_many(query_matrix, top_k)
+        ]
+
+    def query(self, vector, top_k=5, include_metadata=True, **kwargs):
+        """Cosine top-k search, returning a Pinecone-shaped response"""
+        if self._size == 0:
+            return {'matches': []}
+        query_vector = normalize_rows(vector)
+        indices, scores = self._top_k(query_vector, top_k)
+        return {
+            'matches': [self._match(row, score, include_metadata) for row, score in zip(indices, scores)]
+        }
+
+
+class LocalVectorStore(VectorSearch):
+    """Cosine similarity index held in process memory, with inserts, overwrites and deletes"""
+
+    def __init__(self, dimension=None, initial_capacity=1024):
+        self.dimension = dimension
+        self.ids = []
+        self.metadata = []
+        self._id_to_row = {}
+        self._size = 0
+        self._vectors = None
+        if dimension is not None:
+            self._vectors = np.empty((initial_capacity, dimension), dtype=np.float32)
+
+    @property
+    def vectors(self):
+        """View of the populated rows of the embedding matrix"""
+        if self._vectors is None:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    def _reserve(self, extra):
+        """Grow the backing matrix geometrically so inserts stay amortized O(1)"""
+        needed = self._size + extra
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        grown = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def add(self, ids: List[str], embeddings, metadata: Optional[List[Dict[str, Any]]] = None):
+        """Add (or overwrite) vectors with their ids and metadata"""
+        embeddings = normalize_rows(np.atleast_2d(embeddings))
+        if metadata is None:
+            metadata = [{} for _ in ids]
+        if len(ids) != embeddings.shape[0] or len(ids) != len(metadata):
+            raise ValueError("ids, embeddings and metadata must have the same length")
+
+        if self._vectors is None:
+            self.dimension = embeddings.shape[1]
+            self._vectors = np.empty((max(1024, len(ids)), self.dimension), dtype=np.float32)
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {embeddings.shape[1]}")
+
+        new_rows = {}  # id -> (vector, metadata); a repeated id in one batch keeps its last values
+        for vector_id, vector, meta in zip(ids, embeddings, metadata):
+            row = self._id_to_row.get(vector_id)
+            if row is not None:
+                self._vectors[row] = vector
+                self.metadata[row] = meta
+            else:
+                new_rows[vector_id] = (vector, meta)
+
+        if new_rows:
+            self._reserve(len(new_rows))
+            start = self._size
+            for offset, (vector_id, (vector, meta)) in enumerate(new_rows.items()):
+                row = start + offset
+                self._vectors[row] = vector
+                self._id_to_row[vector_id] = row
+                self.ids.append(vector_id)
+                self.metadata.append(meta)
+            self._size += len(new_rows)
+
+    def upsert(self, vectors):
+        """Pinecone-style upsert of (id, values, metadata) tuples"""
+        vectors = list(vectors)
+        if not vectors:
+            return
+        ids = [v[0] for v in vectors]
+        values = [v[1] for v in vectors]
+        metadata = [v[2] if len(v) > 2 else {} for v in vectors]
+        self.add(ids, values, metadata)
+
+    def delete(self, ids):
+        """Remove vectors by id (unknown ids are ignored); returns how many were removed"""
+        rows = {self._id_to_row[vector_id] for vector_id in ids if vector_id in self._id_to_row}
+        if not rows:
+            return 0
+        keep = np.ones(self._size, dtype=bool)
+        keep[list(rows)] = False
+        self._compact(keep)
+        self.ids = [vector_id for vector_id, kept in zip(self.ids, keep) if kept]
+        self.metadata = [meta for meta, kept in zip(self.metadata, keep) if kept]
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self._size = len(self.ids)
+        return len(rows)
+
+    def _compact(self, keep):
+        """Drop the rows of the backing matrix where ``keep`` is False, preserving order"""
+        remaining = int(keep.sum())
+        self._vectors[:remaining] = self._vectors[:self._size][keep]
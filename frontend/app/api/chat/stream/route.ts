@@ -0,0 +1,42 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+export const dynamic = 'force-dynamic'
+
+export async function POST(request: NextRequest) {
+  try {
+    const { message, botType } = await request.json()
+    const format = request.nextUrl.searchParams.get('format')
+    const query = format ? `?format=${encodeURIComponent(format)}` : ''
+    
+    // Forward request to Python Flask backend and relay the event stream as it arrives
+    const response = await fetch(`http://localhost:5000/api/chat/stream${query}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': request.headers.get('accept') ?? 'text/event-stream',
+      },
+      body: JSON.stringify({ message, botType }),
+      cache: 'no-store',
+    })
+    
+    if (!response.ok || !response.body) {
+      throw new Error('Backend server error')
+    }
+    
+    return new Response(response.body, {
+      headers: {
+        'Content-Type': response.headers.get('content-type') ?? 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no',
+      },
+    })
+    
+  } catch (error) {
+    console.error('API Error:', error)
+    return NextResponse.json(
+      { error: 'Failed to process request' },
+      { status: 500 }
+    )
+  }
+}